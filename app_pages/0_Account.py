@@ -1,170 +1,152 @@
 # app_pages/0_Account.py
 from __future__ import annotations
-import re
+from html import escape
 import streamlit as st
 
 from ta_core.services.characters_service import refresh_owned_characters, remove_owned_character
-from ta_core.services.auth_service import signup, login, logout, current_user_id
-from ta_core.auth_repo import get_profile, is_username_available, is_email_available
-from utils.ui_layout import two_cols, form_cols, inject_base_css, single_col
+from ta_core.services.auth_service import logout, current_user_id
+from utils.ui_layout import inject_account_header
 
-# Secciones ocultas (UI aislada)
-from app_pages.sections.add_character import render as render_add_character
-from app_pages.sections.character_information import render as render_character_info
-from app_pages.sections.equipment import render as render_equipment
-from app_pages.sections.wod import render as render_wod
+# Secciones ocultas (UI aislada); las de perfil se importan al seleccionar su vista
+from app_pages.sections.auth import render as render_auth, get_profile_cached
 
 # NO usar st.set_page_config aquí (solo en streamlit_app.py)
-st.title("Account")
-
-USERNAME_RE = re.compile(r"^[A-Za-z0-9_]{3,10}$")
-
-
-def _login_tab() -> None:
-    col_form, _ = form_cols("sm")
-    with col_form:
-        with st.form("login_form", clear_on_submit=False):
-            email = st.text_input("Email", key="login_email").strip().lower()
-            password = st.text_input("Password", type="password", key="login_pwd")
-            submitted = st.form_submit_button("Login")
-
-        if submitted:
-            ok, msg = login(email, password)
-            text = msg if isinstance(msg, str) else str(msg)
-            if ok:
-                st.success("Signed in successfully.")
-                st.session_state["_just_logged_in"] = True
-                st.session_state["account_view"] = "profile"
-                st.rerun()
-            else:
-                st.error(text)
-
-
-def _signup_tab() -> None:
-    inject_base_css()
-    st.caption("**Username** will be publicly visible.")
-
-    st.session_state.setdefault("chk_email", None)
-    st.session_state.setdefault("chk_user", None)
-    st.session_state.setdefault("user_format_error", False)
-
-    # Email
-    col_e_input, col_e_action = two_cols("md")
-    with col_e_input:
-        su_email = st.text_input("Email", value="", placeholder="you@example.com", key="su_email")
-    with col_e_action:
-        if st.button("Check email", key="btn_check_email"):
-            st.session_state.chk_email = is_email_available(su_email)
-
-    ce = st.session_state.chk_email
-    if ce is True:
-        st.success("Email available")
-    elif ce is False:
-        st.error("Email already used")
-
-    # Username
-    col_u_input, col_u_action = two_cols("md")
-    with col_u_input:
-        su_username = st.text_input("Username", value="", placeholder="your_nick", key="su_username")
-        username_msg_slot = st.empty()
-    with col_u_action:
-        if st.button("Check username", key="btn_check_username"):
-            if not USERNAME_RE.match(su_username or ""):
-                st.session_state.user_format_error = True
-                st.session_state.chk_user = None
-            else:
-                st.session_state.user_format_error = False
-                st.session_state.chk_user = is_username_available(su_username)
-
-    if st.session_state.user_format_error:
-        with username_msg_slot:
-            st.warning("Username must be 3–10 chars, letters/numbers/underscore only.")
-    else:
-        username_msg_slot.empty()
-
-    cu = st.session_state.chk_user
-    if not st.session_state.user_format_error:
-        if cu is True:
-            st.success("Username available")
-        elif cu is False:
-            st.error("Username taken")
-
-    # Passwords
-    col_p_input, col_p_confirm = two_cols("md")
-    with col_p_input:
-        su_pass1 = st.text_input("Password", type="password", key="su_pass1")
-        su_pass2 = st.text_input("Confirm password", type="password", key="su_pass2")
-
-    if st.button("Create account", key="btn_signup"):
-        if not su_email or not su_username or not su_pass1 or not su_pass2:
-            st.error("Please fill all fields.")
-            return
-        if su_pass1 != su_pass2:
-            st.error("Passwords do not match.")
-            return
-        if not USERNAME_RE.match(su_username or ""):
-            st.error("Invalid username format.")
-            return
-
-        ok, msg = signup(su_email.strip().lower(), su_pass1, su_username.strip())
-        text = msg if isinstance(msg, str) else str(msg)
-        if ok:
-            st.success("Account created. Please check your email if confirmation is required.")
-        else:
-            st.error(text)
-
-
-def _character_card(uid: str, ch) -> None:
-    """Tarjeta de personaje con nombre centrado y botón rojo 'Delete char'."""
-    card = st.container(border=True)
-    with card:
-        st.markdown(
-            f"""
-            <div style="text-align:center; font-weight:700; margin-bottom:6px;">
-                {ch.name}
-            </div>
-            <div style="margin-bottom:10px; text-align:center;">
-                Level {ch.level} · {ch.vocation} · {ch.world}
-            </div>
-            """,
-            unsafe_allow_html=True,
-        )
-        if st.button("Delete char", key=f"del_{ch.name}", type="primary", use_container_width=True):
-            if remove_owned_character(uid, ch.name):
-                st.rerun()
-
-    # Estiliza en rojo solo los botones 'primary' (Delete)
-    st.markdown(
-        """
-        <style>
-        div[data-testid="stButton"] > button[kind="primary"] {
-            background:#ef4444; border-color:#ef4444;
-        }
-        </style>
-        """,
-        unsafe_allow_html=True,
+inject_account_header()
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _chars_cached(uid: str):
+    """Personajes del usuario cacheados; se invalida con Refresh o al borrar uno."""
+    return refresh_owned_characters(uid)
+
+
+def _character_card_html(ch) -> str:
+    """Tarjeta de personaje (HTML) con nombre centrado."""
+    return (
+        '<div class="char-card">'
+        f'<div style="text-align:center; font-weight:700; margin-bottom:6px;">{escape(ch.name)}</div>'
+        f'<div style="margin-bottom:4px; text-align:center;">'
+        f'Level {ch.level} · {escape(ch.vocation)} · {escape(ch.world)}</div>'
+        '</div>'
     )
 
 
-def _profile_tab() -> None:
-    """Vista 'Profile' solo para usuarios autenticados."""
-    uid = current_user_id()
-    if not uid:
-        st.info("Please sign in to view your profile.")
+def _delete_button(uid: str, ch) -> None:
+    """Botón rojo 'Delete' del personaje (estilo 'primary' desde inject_account_header())."""
+    key = f"del_{ch.name}"
+    pending = f"_pending_{key}"  # borrado en curso (se limpia siempre al terminar)
+    failed = f"_failed_{key}"    # último intento fallido (se limpia en el siguiente intento)
+    if not st.button(f"Delete {ch.name}", key=key, type="primary", use_container_width=True):
+        if st.session_state.get(failed):
+            st.error(f"Could not delete {ch.name}. Try again.")
+        return
+
+    # Doble click: un segundo rerun mientras el primero sigue borrando no vuelve a llamar al backend
+    if st.session_state.get(pending):
         return
+    st.session_state[pending] = True
+    st.session_state.pop(failed, None)
+    try:
+        if remove_owned_character(uid, ch.name):
+            _chars_cached.clear()
+            st.rerun(scope="fragment")
+        st.session_state[failed] = True
+        st.error(f"Could not delete {ch.name}. Try again.")
+    finally:
+        st.session_state.pop(pending, None)
+
 
-    # Si el botón dejó encolado un refresh en el ciclo anterior, ejecútalo ahora
-    if st.session_state.pop("do_account_refresh", False):
+@st.fragment
+def _actions_panel(uid: str) -> None:
+    """Botonera de acciones. Cambiar de vista o de sesión afecta a toda la página (rerun app)."""
+
+    def _to(view: str) -> None:
+        st.session_state["account_view"] = view
+        st.rerun()
+
+    if st.button("Add character", use_container_width=True):
+        _to("add_character")
+    if st.button("Character information", use_container_width=True):
+        _to("character_info")
+    if st.button("Equipment", use_container_width=True):
+        _to("equipment")
+    if st.button("WoD", use_container_width=True):
+        _to("wod")
+
+    # Refresh: limpia cachés y rerun completo para que el grid (otro fragment) se repinte
+    if st.button("Refresh", key="btn_account_refresh", use_container_width=True):
         from ta_core.services import characters_service as _chars
         # limpiar caché de API si existe
         if hasattr(_chars, "_fetch_api_cached") and hasattr(_chars._fetch_api_cached, "clear"):
             _chars._fetch_api_cached.clear()
-        # refresco normal (tu función no acepta 'force')
-        refresh_owned_characters(uid)
-        st.success("Characters refreshed!")
+        # refresco normal (tu función no acepta 'force'); deja la caché caliente para el rerun
+        _chars_cached.clear()
+        _chars_cached(uid)
+        st.toast("Characters refreshed!")
+        st.rerun()
+
+    if st.button("Logout", use_container_width=True):
+        logout()
+        get_profile_cached.clear()
+        st.session_state["account_view"] = None
         st.rerun()
 
-    prof = get_profile(uid) or {}
+
+@st.fragment
+def _chars_grid(uid: str) -> None:
+    """Grid de personajes; Delete y la paginación solo re-ejecutan este fragment."""
+    st.markdown(
+        """
+        <h3 style="text-align:center; margin-bottom: 1rem;">
+            Characters
+        </h3>
+        """,
+        unsafe_allow_html=True,
+    )
+
+    chars = _chars_cached(uid)
+
+    if not chars:
+        st.info("No data available")
+        return
+
+    # Solo se pinta la página visible (PAGE tarjetas por rerun)
+    PER_ROW = 3
+    PAGE = 9
+    n_pages = (len(chars) + PAGE - 1) // PAGE
+    page = min(st.session_state.setdefault("chars_page", 0), n_pages - 1)
+    st.session_state["chars_page"] = page
+    view = chars[page * PAGE:(page + 1) * PAGE]
+
+    # Una fila de st.columns por cada PER_ROW tarjetas; cada tarjeta lleva su Delete debajo,
+    # en la misma columna (también cuando las columnas se apilan en móvil)
+    for start in range(0, len(view), PER_ROW):
+        cols = st.columns(PER_ROW, gap="large")
+        for col, ch in zip(cols, view[start:start + PER_ROW]):
+            with col:
+                st.markdown(_character_card_html(ch), unsafe_allow_html=True)
+                _delete_button(uid, ch)
+
+    if n_pages > 1:
+        def _to_page(p: int) -> None:
+            st.session_state["chars_page"] = p
+
+        col_prev, col_info, col_next = st.columns([1, 2, 1], vertical_alignment="center")
+        with col_prev:
+            st.button("Prev", key="btn_chars_prev", disabled=page <= 0,
+                      on_click=_to_page, args=(page - 1,), use_container_width=True)
+        with col_info:
+            st.markdown(
+                f"<div style='text-align:center;'>Page {page + 1} / {n_pages}</div>",
+                unsafe_allow_html=True,
+            )
+        with col_next:
+            st.button("Next", key="btn_chars_next", disabled=page >= n_pages - 1,
+                      on_click=_to_page, args=(page + 1,), use_container_width=True)
+
+
+def _profile_tab(uid: str) -> None:
+    """Vista 'Profile' solo para usuarios autenticados (uid resuelto una vez por rerun)."""
+    prof = get_profile_cached(uid)
     st.subheader("")
 
     # Tres columnas de 1er nivel: acciones | detalles | characters
@@ -172,42 +154,13 @@ def _profile_tab() -> None:
 
     # --- Acciones ---
     with col_actions:
-        def _to(view: str) -> None:
-            st.session_state["account_view"] = view
-
-        st.button("Add character", on_click=lambda: _to("add_character"), use_container_width=True)
-        st.button("Character information", on_click=lambda: _to("character_info"), use_container_width=True)
-        st.button("Equipment", on_click=lambda: _to("equipment"), use_container_width=True)
-        st.button("WoD", on_click=lambda: _to("wod"), use_container_width=True)
-
-        # Botón Refresh (mismo estilo que el resto)
-        def _queue_refresh() -> None:
-            st.session_state["do_account_refresh"] = True  # se procesará al inicio del próximo ciclo
-
-        st.button(
-            "Refresh",
-            key="btn_account_refresh",     # key única para evitar colisiones
-            on_click=_queue_refresh,
-            use_container_width=True,
-        )
-
-        def _do_logout() -> None:
-            logout()
-            st.session_state["account_view"] = None
-            st.rerun()
-        st.button("Logout", on_click=_do_logout, use_container_width=True)
+        _actions_panel(uid)
 
     # --- Detalles de cuenta (marco ajustado al contenido) ---
     with col_details:
         st.markdown(
             f"""
-            <div style="
-                display:inline-block;
-                border:1px solid rgba(255,255,255,0.2);
-                border-radius:12px;
-                padding:12px 20px;
-                margin-top:4px;
-            ">
+            <div class="account-details">
                 <p><strong>Username:</strong> {prof.get('username', '—')}</p>
                 <p><strong>Email:</strong> <a href="mailto:{prof.get('email', '—')}" target="_blank">{prof.get('email', '—')}</a></p>
                 <p><strong>Role:</strong> {prof.get('role', 'user')}</p>
@@ -218,31 +171,7 @@ def _profile_tab() -> None:
 
     # --- Characters (grid) ---
     with col_chars:
-        st.markdown(
-            """
-            <h3 style="text-align:center; margin-bottom: 1rem;">
-                Characters
-            </h3>
-            """,
-            unsafe_allow_html=True,
-        )
-
-        chars = refresh_owned_characters(uid)
-
-        if not chars:
-            st.info("No data available")
-        else:
-            PER_ROW = 3
-            idx = 0
-            while idx < len(chars):
-                row_cols = st.columns(PER_ROW, gap="large")
-                for c in row_cols:
-                    if idx >= len(chars):
-                        break
-                    ch = chars[idx]
-                    idx += 1
-                    with c:
-                        _character_card(uid, ch)
+        _chars_grid(uid)
 
 
 
@@ -250,42 +179,24 @@ def _profile_tab() -> None:
 # Render según estado de sesión
 # ----------------------------
 uid = current_user_id()
-if st.session_state.pop("_just_logged_in", False) and uid:
-    pass
 
 if uid:
     account_view = st.session_state.get("account_view") or "profile"
     if account_view == "add_character":
+        from app_pages.sections.add_character import render as render_add_character
         render_add_character(on_back=lambda: st.session_state.update(account_view="profile"))
     elif account_view == "character_info":
+        from app_pages.sections.character_information import render as render_character_info
         render_character_info(on_back=lambda: st.session_state.update(account_view="profile"))
     elif account_view == "equipment":
+        from app_pages.sections.equipment import render as render_equipment
         render_equipment(on_back=lambda: st.session_state.update(account_view="profile"))
     elif account_view == "wod":
+        from app_pages.sections.wod import render as render_wod
         render_wod(on_back=lambda: st.session_state.update(account_view="profile"))
     else:
         (tab_profile,) = st.tabs(["Profile"])
         with tab_profile:
-            _profile_tab()
+            _profile_tab(uid)
 else:
-    DEFAULT = "Login"
-    options = ["Login", "Sign up"]
-    current = st.session_state.get("account_mode", DEFAULT)
-    try:
-        start_index = options.index(current)
-    except ValueError:
-        start_index = 0
-
-    choice = st.radio(
-        label="Account mode",
-        options=options,
-        index=start_index,
-        horizontal=True,
-        label_visibility="collapsed",
-        key="account_mode",
-    )
-
-    if choice == "Login":
-        _login_tab()
-    else:
-        _signup_tab()
+    render_auth()
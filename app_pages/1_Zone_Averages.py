@@ -1,76 +1,29 @@
 from __future__ import annotations
-from typing import List, Dict, Callable
+from typing import Callable, List, Dict
 import re
 import os
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import pandas as pd
 import streamlit as st
 
-from ta_core.repository import load_store
-from ta_core.normalizer import normalize_records
 from ta_core.aggregator import aggregate_by_zone, compute_monsters_kph_for_df
 from ta_core.export import df_to_csv_bytes
 
-from utils.tibiawiki import get_monster_icon_data_uri  # usamos data URI (backend)
+from utils.tibiawiki import (  # usamos data URI (backend)
+    cached_icon_data_uri,
+    fetch_monster_icon_bytes,
+    flush_icon_cache,
+    store_icon_data_uri,
+)
+from utils.data import load_normalized_store, store_signature
+from utils.formatting import fmt_duration_texts
 
 # ---------- helpers ----------
-def fmt_int(val):
-    if pd.isna(val):
-        return ""
-    try:
-        n = round(float(val))
-        return f"{int(n):,}".replace(",", ".")
-    except Exception:
-        return str(val)
-
-def fmt_hours(val):
-    if pd.isna(val):
-        return ""
-    try:
-        return f"{float(val):,.2f}".replace(",", ".")
-    except Exception:
-        return str(val)
-
-def style_center(
-    df: pd.DataFrame,
-    fmt_map: Dict[str, Callable] | None = None,
-    hide_index: bool = True,
-):
-    sty = (
-        df.style.set_table_styles(
-            [
-                {"selector": "th", "props": [("text-align", "center")]},
-                {"selector": "td", "props": [("text-align", "center")]},
-            ]
-        ).set_properties(**{"text-align": "center"})
-    )
-    if fmt_map:
-        sty = sty.format(fmt_map)
-    if hide_index:
-        try:
-            sty = sty.hide(axis="index")
-        except Exception:
-            try:
-                sty = sty.hide_index()
-            except Exception:
-                pass
-    return sty
-
-def make_level_buckets(buckets: list[tuple[int, int]]) -> list[dict]:
-    result = []
-    for (start, end) in buckets:
-        label = f"{start}–{end}"
-        result.append({"label": label, "min": start, "max": end})
-    return result
-
-def make_fixed_size_buckets(start: int, end: int, size: int) -> list[dict]:
-    buckets = []
-    current = start
-    while current <= end:
-        upper = min(current + size, end)
-        label = f"{current}–{upper}"
-        buckets.append({"label": label, "min": current, "max": upper})
-        current = upper + 1
-    return buckets
+def fmt_int_array(values) -> List[str]:
+    """Enteros con '.' de miles para una columna: un rint en NumPy y un f-string por valor (NaN → '')."""
+    arr = np.rint(pd.to_numeric(pd.Series(values), errors="coerce").to_numpy(dtype=np.float64))
+    return ["" if v != v else f"{int(v):,}".replace(",", ".") for v in arr.tolist()]
 
 # numeric sort for level ranges like "401-450"
 _first_num_re = re.compile(r"\d+")
@@ -80,19 +33,6 @@ def _bucket_sort_key(s: str) -> int:
     m = _first_num_re.search(s)
     return int(m.group()) if m else 10**9
 
-# duration "Xh Ymin" / "Xmin"
-def fmt_duration_text(hours_float: float) -> str:
-    try:
-        mins = int(round(float(hours_float) * 60))
-    except Exception:
-        return ""
-    h, m = divmod(mins, 60)
-    if h <= 0:
-        return f"{m}min"
-    if m == 0:
-        return f"{h}h"
-    return f"{h}h {m}min"
-
 # ---------- Bestiary helpers ----------
 _BESTIARY_REQ = {
     "Harmless": 25,
@@ -103,18 +43,10 @@ _BESTIARY_REQ = {
     "Challenging": 5000,
 }
 
-def _norm_diff(diff: str | None) -> str | None:
-    if not diff:
-        return None
-    d = str(diff).strip()
-    for k in _BESTIARY_REQ.keys():
-        if d.lower() == k.lower():
-            return k
-    return None
+_BESTIARY_REQ_LC = {k.lower(): v for k, v in _BESTIARY_REQ.items()}
 
 def _req_for_diff(diff: str | None) -> int | None:
-    d = _norm_diff(diff)
-    return _BESTIARY_REQ.get(d) if d else None
+    return _BESTIARY_REQ_LC.get(str(diff).strip().lower()) if diff else None
 
 def _fmt_eta_hours(h: float | None) -> str:
     if h is None:
@@ -135,32 +67,101 @@ def load_bestiary_lookup() -> Dict[str, str]:
     for path in candidates:
         if os.path.exists(path):
             try:
-                df = pd.read_csv(path)
-                lut: Dict[str, str] = {}
-                for _, r in df.iterrows():
-                    m = str(r.get("monster", "")).strip()
-                    d = str(r.get("difficulty", "")).strip()
-                    if m and d:
-                        lut[m.lower()] = d
-                return lut
+                df = pd.read_csv(path, usecols=["monster", "difficulty"], dtype=str).dropna()
+                monsters = df["monster"].str.strip().str.lower().to_numpy()
+                diffs = df["difficulty"].str.strip().to_numpy()
+                return {m: d for m, d in zip(monsters, diffs) if m and d}
             except Exception:
                 pass
     return {}
 
 BESTIARY_LUT = load_bestiary_lookup()
 
+@st.cache_data(show_spinner=False, max_entries=4)
+def _filter_index(sig: tuple) -> Dict[str, Dict[str, List[str]]]:
+    """
+    {vocation: {mode: [level_bucket, ...]}} por versión del store (sig = mtime/tamaño),
+    ya ordenado (vocaciones y modos alfabéticos, niveles por límite inferior) y sin vacíos:
+    los reruns solo leen listas hechas.
+    """
+    _, df, _ = load_normalized_store()
+    if df.empty or not {"vocation", "mode", "level_bucket"} <= set(df.columns):
+        return {}
+    grouped = df.groupby(["vocation", "mode"], sort=False, observed=True)["level_bucket"].unique()
+    idx: Dict[str, Dict[str, List[str]]] = {}
+    for (v, m), levels in grouped.items():
+        if str(v).strip():
+            idx.setdefault(v, {})[m] = sorted({b for b in levels if str(b).strip()}, key=_bucket_sort_key)
+    return {v: dict(sorted(modes.items())) for v, modes in sorted(idx.items())}
+
+
+# columnas de aggregate_by_zone que se muestran → nombre en la tabla
+ZONE_TABLE_COLS = {
+    "Zona": "Zone",
+    "Hunts": "Hunts",
+    "Horas": "Hours",
+    "Balance (media/h)": "Balance (avg/h)",
+    "Raw XP Gain (media/h)": "Raw XP Gain (avg/h)",
+}
+
+def _filter_mask(df: pd.DataFrame, voc: str, mode: str, level: str) -> np.ndarray:
+    # Una sola máscara booleana en lugar de tres DataFrames intermedios
+    mask = np.ones(len(df), dtype=bool)
+    if not df.empty:
+        # Comparación sobre la Series: en columnas category compara códigos enteros
+        if voc:
+            mask &= (df["vocation"] == voc).to_numpy()
+        if mode:
+            mask &= (df["mode"] == mode).to_numpy()
+        if level != "All":
+            mask &= (df["level_bucket"] == level).to_numpy()
+    return mask
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def _zone_table(sig: tuple, voc: str, mode: str, level: str) -> pd.DataFrame:
+    """Tabla por zona (renombrada, con Stamina) de un filtro, por versión del store."""
+    _, df, _ = load_normalized_store()
+    agg = aggregate_by_zone(df.loc[_filter_mask(df, voc, mode, level)])
+    if not agg.empty:
+        # Selección + renombrado en un paso (en el orden de la tabla) y Stamina sobre el array
+        agg = agg.loc[:, list(ZONE_TABLE_COLS)].rename(columns=ZONE_TABLE_COLS)
+        agg["Stamina (avg/h)"] = agg["Raw XP Gain (avg/h)"].to_numpy(dtype=np.float64) * 1.5
+    return agg
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def _zone_csv(sig: tuple, voc: str, mode: str, level: str) -> bytes:
+    # Clave = versión del store + filtro (sin hashear el frame en cada rerun)
+    return df_to_csv_bytes(_zone_table(sig, voc, mode, level))
+
+def _session_memo(name: str, sig: tuple, compute: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+    """
+    Último resultado por sesión: si la firma (store + filtro) no cambió, se reutiliza
+    el mismo objeto sin pasar por st.cache_data (que hashea args y devuelve una copia).
+    Los frames memorizados solo se leen.
+    """
+    memo = st.session_state.get(name)
+    if memo is not None and memo[0] == sig:
+        return memo[1]
+    value = compute()
+    st.session_state[name] = (sig, value)
+    return value
+
+# Cabecera de la tabla de ETA del bestiario (se concatena con las filas en un solo markdown)
+_ETA_HEADER_HTML = (
+    '<div style="display:grid;grid-template-columns:auto 120px 120px;gap:0.5rem;'
+    'padding:6px 8px;font-weight:600;border-bottom:1px solid rgba(255,255,255,0.08);">'
+    '<div>Monster</div><div style="text-align:right;">KPH</div><div style="text-align:right;">ETA</div>'
+    '</div>'
+)
+
 # ---------- data ----------
 st.title("Zone Averages")
-store = load_store()
-norm_df, pending_df = normalize_records(store)
-
-LEVEL_BUCKETS = []
+store_sig = store_signature()
 
 # ---------- filters ----------
 st.markdown("### Filters")
-vocation_options = sorted(
-    {v for v in norm_df.get("vocation", pd.Series(dtype=str)).unique() if str(v).strip()}
-)
+filter_idx = _filter_index(store_sig)
+vocation_options = list(filter_idx)
 cfa, cfb, cfc, _ = st.columns([0.22, 0.22, 0.22, 0.34])
 
 with cfa:
@@ -174,10 +175,8 @@ with cfa:
     )
 
 with cfb:
-    subset_modes = norm_df[norm_df["vocation"] == voc_value] if voc_value else pd.DataFrame()
-    mode_options = sorted(
-        {m for m in subset_modes.get("mode", pd.Series(dtype=str)).unique() if str(m).strip()}
-    )
+    voc_modes = filter_idx.get(voc_value, {}) if voc_value else {}
+    mode_options = [m for m in voc_modes if str(m).strip()]
     default_mode_idx = mode_options.index("Solo") if "Solo" in mode_options else 0
     mode_value = st.selectbox(
         "Mode",
@@ -188,11 +187,10 @@ with cfb:
     )
 
 with cfc:
-    subset_levels = subset_modes[subset_modes["mode"] == mode_value] if mode_value else subset_modes
-    level_raw = {
-        b for b in subset_levels.get("level_bucket", pd.Series(dtype=str)).unique() if str(b).strip()
-    }
-    level_options = sorted(level_raw, key=_bucket_sort_key)
+    if mode_value:
+        level_options = voc_modes.get(mode_value, [])
+    else:
+        level_options = sorted({b for levels in voc_modes.values() for b in levels}, key=_bucket_sort_key)
     level_value = st.selectbox(
         "Level",
         ["All", *level_options],
@@ -201,254 +199,194 @@ with cfc:
         key="za_level",
     )
 
-# apply filters to hunts
-filtered = norm_df.copy()
-if not filtered.empty and voc_value:
-    filtered = filtered[filtered["vocation"] == voc_value]
-if not filtered.empty and mode_value:
-    filtered = filtered[filtered["mode"] == mode_value]
-if not filtered.empty and level_value != "All":
-    filtered = filtered[filtered["level_bucket"] == level_value]
-
-# aggregate
-agg_df = aggregate_by_zone(filtered)
-if not agg_df.empty:
-    rename_map = {
-        "Zona": "Zone",
-        "Hunts": "Hunts",
-        "Horas": "Hours",
-        "XP Gain (media/h)": "XP Gain (avg/h)",
-        "Raw XP Gain (media/h)": "Raw XP Gain (avg/h)",
-        "Supplies (media/h)": "Supplies (avg/h)",
-        "Loot (media/h)": "Loot (avg/h)",
-        "Balance (media/h)": "Balance (avg/h)",
-    }
-    agg_df = agg_df.rename(columns=rename_map)
-    for c in ["Supplies (avg/h)", "Loot (avg/h)", "XP Gain (avg/h)"]:
-        if c in agg_df.columns:
-            agg_df = agg_df.drop(columns=[c])
-    if "Raw XP Gain (avg/h)" in agg_df.columns:
-        agg_df["Stamina (avg/h)"] = agg_df["Raw XP Gain (avg/h)"] * 1.5
-    order_cols = [
-        "Zone",
-        "Hunts",
-        "Hours",
-        "Balance (avg/h)",
-        "Raw XP Gain (avg/h)",
-        "Stamina (avg/h)",
-    ]
-    agg_df = agg_df[[c for c in order_cols if c in agg_df.columns]]
-
-st.markdown("---")
-st.markdown("## Zone Averages")
+# aggregate (cacheado por versión del store + filtro)
+filter_sig = (store_sig, voc_value, mode_value, level_value)
+agg_df = _session_memo("_za_agg", filter_sig, lambda: _zone_table(*filter_sig))
+
+
+def _render_zone_details(zone_name: str) -> None:
+    """Contenido de 'More details' de una zona: últimas 10 hunts + ETA del bestiario."""
+    # Solo se pinta la zona seleccionada: su máscara (filtro + zona) sale de una pasada
+    _, norm_df, _ = load_normalized_store()
+    if "zona" not in norm_df.columns:
+        return
+    zone_mask = _filter_mask(norm_df, voc_value, mode_value, level_value)
+    zone_all = norm_df.loc[zone_mask & (norm_df["zona"] == zone_name).to_numpy()]
+
+    # Primero ordenar y quedarse con las 10 últimas; el formateo solo toca esas filas.
+    # session_*_dt y __hours ya vienen calculadas desde load_normalized_store().
+    # nlargest: selección parcial de 10 en vez de ordenar toda la zona
+    zdf = zone_all.nlargest(10, "session_end_dt")
+    if len(zdf) < min(10, len(zone_all)):  # NaT al final, como hacía sort_values
+        zdf = pd.concat([zdf, zone_all[zone_all["session_end_dt"].isna()].head(10 - len(zdf))])
+
+    if "duration_sec" in zdf.columns:
+        hours = zdf["duration_sec"].to_numpy(dtype=np.float64) / 3600.0
+    else:
+        hours = zdf["__hours"].to_numpy(dtype=np.float64)
+    durations = fmt_duration_texts(hours)
+
+    out = pd.DataFrame(index=zdf.index)
+    if "session_start" in zdf.columns:
+        out["Start"] = zdf["session_start"]
+    if "session_end" in zdf.columns:
+        out["End"] = zdf["session_end"]
+    out["Duration"] = durations
+    if "raw_xp_gain" in zdf.columns:
+        raw = zdf["raw_xp_gain"].to_numpy(dtype=np.float64)
+        out["Raw XP Gain"] = raw
+        out["Stamina"] = raw * 1.5
+    else:
+        out["Stamina"] = 0.0
+    if "balance" in zdf.columns:
+        out["Balance"] = zdf["balance"]
+    zdf = out
+
+    st.caption("Last 10 hunts (raw data, no averages)")
+    # Sin Styler: st.dataframe formatea en el cliente con column_config
+    int_col = st.column_config.NumberColumn(format="%d")
+    st.dataframe(
+        zdf,
+        column_config={"Raw XP Gain": int_col, "Stamina": int_col, "Balance": int_col},
+        hide_index=True,
+        use_container_width=True,
+    )
 
-if agg_df.empty:
-    st.table(pd.DataFrame())
-    current_df = agg_df
-else:
-    sort_cols = list(agg_df.columns)
-    sc1, sc2, _ = st.columns([0.28, 0.28, 0.44])
-    with sc1:
-        sort_by = st.selectbox("Sort by", options=sort_cols, index=0, key="za_sort_by")
-    with sc2:
-        order = st.radio("Order", ["Ascending", "Descending"], index=0, horizontal=True, key="za_sort_order")
-    ascending = order == "Ascending"
-
-    current_df = agg_df.sort_values(by=sort_by, ascending=ascending, kind="mergesort")
-
-    hdr = st.container()
-    with hdr:
-        c = st.columns([3, 1, 1, 1, 1, 1])
-        c[0].markdown("**Zone**")
-        c[1].markdown("**Hunts**")
-        c[2].markdown("**Hours**")
-        c[3].markdown("**Balance (avg/h)**")
-        c[4].markdown("**Raw XP Gain (avg/h)**")
-        if "Stamina (avg/h)" in current_df.columns:
-            c[5].markdown("**Stamina (avg/h)**")
-        else:
-            c[5].markdown("")
-
-    for _, r in current_df.iterrows():
-        zone_name = str(r.get("Zone", ""))
-        cols = st.columns([3, 1, 1, 1, 1, 1])
-        cols[0].write(zone_name)
-        cols[1].write(fmt_int(r.get("Hunts", 0)))
-        cols[2].write(fmt_hours(r.get("Hours", 0.0)))
-        cols[3].write(fmt_int(r.get("Balance (avg/h)", 0)))
-        cols[4].write(fmt_int(r.get("Raw XP Gain (avg/h)", 0)))
-        if "Stamina (avg/h)" in current_df.columns:
-            cols[5].write(fmt_int(r.get("Stamina (avg/h)", 0)))
-        else:
-            cols[5].write("")
-
-        with st.expander("More details"):
-            zdf = filtered[filtered["zona"] == zone_name].copy()
-            zdf["session_start_dt"] = pd.to_datetime(zdf.get("session_start"), errors="coerce")
-            zdf["session_end_dt"] = pd.to_datetime(zdf.get("session_end"), errors="coerce")
-
-            if "duration_sec" in zdf.columns:
-                zdf["__hours"] = zdf["duration_sec"].astype(float) / 3600.0
+    st.markdown("---\n#### 📘 Bestiary — time to complete (ETA)")
+
+    monsters_kph: Dict[str, float] = compute_monsters_kph_for_df(zone_all)
+
+    if not monsters_kph:
+        st.info("No **KPH per monster** data in this zone yet.")
+    else:
+        # Iconos de la caché de disco/proceso; los que faltan son peticiones HTTP a la wiki,
+        # así que se descargan en paralelo. Los hilos solo bajan bytes (nada de Streamlit:
+        # no tienen ScriptRunContext); los data URI se construyen y guardan aquí.
+        names = list(monsters_kph)
+        icons = {n: cached_icon_data_uri(n) for n in names}
+        missing = [n for n in names if icons[n] is None]
+        if missing:
+            with ThreadPoolExecutor(max_workers=min(8, len(missing))) as ex:
+                fetched = list(ex.map(fetch_monster_icon_bytes, missing))
+            for n, res in zip(missing, fetched):
+                if res:
+                    icons[n] = store_icon_data_uri(n, *res)
+            flush_icon_cache()
+        rows_eta = []
+        for monster, kph in monsters_kph.items():
+            name_lc = str(monster).lower().strip()
+            diff = BESTIARY_LUT.get(name_lc)
+            req = _req_for_diff(diff)
+            eta_h = None
+            if req is not None and kph > 0:
+                eta_h = float(req) / float(kph)
+
+            data_uri_pack = icons.get(monster)
+            if data_uri_pack:
+                data_uri, src_url = data_uri_pack
             else:
-                zdf["__hours"] = (
-                    zdf["session_end_dt"] - zdf["session_start_dt"]
-                ).dt.total_seconds() / 3600.0
-            zdf["Duration"] = zdf["__hours"].apply(fmt_duration_text)
-
-            if "raw_xp_gain" in zdf.columns:
-                zdf["Stamina"] = zdf["raw_xp_gain"].astype(float) * 1.5
+                data_uri, src_url = None, None
+
+            rows_eta.append({
+                "data_uri": data_uri,
+                "src_url": src_url or "",
+                "Monster": monster,
+                "KPH": round(float(kph), 2),
+                "ETA": _fmt_eta_hours(eta_h),
+                "_eta_min": 10**9 if eta_h is None else int(round(eta_h * 60)),
+                "_mon_lc": name_lc,
+            })
+
+        # Orden numérico: ETA en minutos (sin ETA al final) y después nombre
+        rows_eta_sorted = sorted(rows_eta, key=lambda r: (r["_eta_min"], r["_mon_lc"]))
+        kph_txt = fmt_int_array([r["KPH"] for r in rows_eta_sorted])
+
+        rows_html = [_ETA_HEADER_HTML]
+        for row, kph_cell in zip(rows_eta_sorted, kph_txt):
+            if row["data_uri"]:
+                icon_box = (
+                    f'<div style="width:48px;height:48px;border-radius:8px;overflow:hidden;'
+                    f'display:inline-flex;align-items:center;justify-content:center;'
+                    f'background:rgba(255,255,255,0.04);flex:0 0 auto;">'
+                    f'  <img src="{row["data_uri"]}" title="{row["src_url"]}" '
+                    f'       style="width:100%;height:100%;object-fit:contain;'
+                    f'              image-rendering:pixelated;display:block;">'
+                    f'</div>'
+                )
             else:
-                zdf["Stamina"] = 0.0
-
-            cols_out = []
-            if "session_start" in zdf.columns:
-                cols_out.append("session_start")
-            if "session_end" in zdf.columns:
-                cols_out.append("session_end")
-            cols_out += ["Duration"]
-            if "raw_xp_gain" in zdf.columns:
-                cols_out.append("raw_xp_gain")
-            if "Stamina" in zdf.columns:
-                cols_out.append("Stamina")
-            if "balance" in zdf.columns:
-                cols_out.append("balance")
-
-            if "session_end_dt" in zdf.columns:
-                zdf = zdf.sort_values(by="session_end_dt", ascending=False)
-            elif "session_start_dt" in zdf.columns:
-                zdf = zdf.sort_values(by="session_start_dt", ascending=False)
-
-            zdf = zdf[cols_out].head(10).rename(
-                columns={
-                    "session_start": "Start",
-                    "session_end": "End",
-                    "raw_xp_gain": "Raw XP Gain",
-                    "balance": "Balance",
-                }
+                icon_box = (
+                    '<div style="width:48px;height:48px;border-radius:8px;overflow:hidden;'
+                    'display:inline-flex;align-items:center;justify-content:center;'
+                    'background:rgba(255,255,255,0.04);flex:0 0 auto;" title="(no image)">🖼️</div>'
+                )
+
+            monster_cell = (
+                f'<div style="display:flex;align-items:center;gap:10px;">'
+                f'  {icon_box}'
+                f'  <span style="line-height:48px;">{row["Monster"]}</span>'
+                f'</div>'
             )
 
-            st.caption("Last 10 hunts (raw data, no averages)")
-            st.table(
-                style_center(
-                    zdf,
-                    {"Raw XP Gain": fmt_int, "Stamina": fmt_int, "Balance": fmt_int},
-                    hide_index=True,
-                )
+            rows_html.append(
+                f'''
+                <div style="display:grid;grid-template-columns:auto 120px 120px;gap:0.5rem;
+                            padding:10px 8px;border-bottom:1px solid rgba(255,255,255,0.04);">
+                  <div>{monster_cell}</div>
+                  <div style="text-align:right;">{kph_cell}</div>
+                  <div style="text-align:right;">{row["ETA"]}</div>
+                </div>
+                '''.strip()
             )
 
-            st.markdown("---")
-            st.markdown("#### 📘 Bestiary — time to complete (ETA)")
+        # Cabecera + filas en un único st.markdown; sin líneas en blanco entre filas,
+        # todo es un solo bloque HTML
+        st.markdown("".join(rows_html), unsafe_allow_html=True)
 
-            zone_all = filtered[filtered["zona"] == zone_name].copy()
-            monsters_kph: Dict[str, float] = compute_monsters_kph_for_df(zone_all)
 
-            if not monsters_kph:
-                st.info("No **KPH per monster** data in this zone yet.")
-            else:
-                rows_eta = []
-                for monster, kph in monsters_kph.items():
-                    name_lc = str(monster).lower().strip()
-                    diff = BESTIARY_LUT.get(name_lc)
-                    req = _req_for_diff(diff)
-                    eta_h = None
-                    if req is not None and kph > 0:
-                        eta_h = float(req) / float(kph)
-
-                    data_uri_pack = get_monster_icon_data_uri(monster)
-                    if data_uri_pack:
-                        data_uri, src_url = data_uri_pack
-                    else:
-                        data_uri, src_url = None, None
-
-                    rows_eta.append({
-                        "data_uri": data_uri,
-                        "src_url": src_url or "",
-                        "Monster": monster,
-                        "KPH": round(float(kph), 2),
-                        "ETA": _fmt_eta_hours(eta_h),
-                    })
-
-                def _sort_key(row: Dict) -> tuple:
-                    eta = row.get("ETA", "—")
-                    if eta == "—":
-                        return (1, 10**9, row["Monster"].lower())
-                    txt = str(eta)
-                    mins = 0
-                    if "h" in txt:
-                        try:
-                            parts = txt.replace("min", "").split("h")
-                            H = int(parts[0].strip())
-                            M = int(parts[1].strip()) if parts[1].strip() else 0
-                            mins = H * 60 + M
-                        except Exception:
-                            mins = 10**8
-                    else:
-                        try:
-                            mins = int(txt.replace("min", "").strip())
-                        except Exception:
-                            mins = 10**8
-                    return (0, mins, row["Monster"].lower())
-
-                rows_eta_sorted = sorted(rows_eta, key=_sort_key)
-
-                st.markdown(
-                    """
-                    <div style="display:grid;grid-template-columns:auto 120px 120px;gap:0.5rem;
-                                padding:6px 8px;font-weight:600;border-bottom:1px solid rgba(255,255,255,0.08);">
-                      <div>Monster</div>
-                      <div style="text-align:right;">KPH</div>
-                      <div style="text-align:right;">ETA</div>
-                    </div>
-                    """, unsafe_allow_html=True)
-
-                rows_html = []
-                for row in rows_eta_sorted:
-                    if row["data_uri"]:
-                        icon_box = (
-                            f'<div style="width:48px;height:48px;border-radius:8px;overflow:hidden;'
-                            f'display:inline-flex;align-items:center;justify-content:center;'
-                            f'background:rgba(255,255,255,0.04);flex:0 0 auto;">'
-                            f'  <img src="{row["data_uri"]}" title="{row["src_url"]}" '
-                            f'       style="width:100%;height:100%;object-fit:contain;'
-                            f'              image-rendering:pixelated;display:block;">'
-                            f'</div>'
-                        )
-                    else:
-                        icon_box = (
-                            '<div style="width:48px;height:48px;border-radius:8px;overflow:hidden;'
-                            'display:inline-flex;align-items:center;justify-content:center;'
-                            'background:rgba(255,255,255,0.04);flex:0 0 auto;" title="(no image)">🖼️</div>'
-                        )
-
-                    monster_cell = (
-                        f'<div style="display:flex;align-items:center;gap:10px;">'
-                        f'  {icon_box}'
-                        f'  <span style="line-height:48px;">{row["Monster"]}</span>'
-                        f'</div>'
-                    )
-
-                    rows_html.append(
-                        f'''
-                        <div style="display:grid;grid-template-columns:auto 120px 120px;gap:0.5rem;
-                                    padding:10px 8px;border-bottom:1px solid rgba(255,255,255,0.04);">
-                          <div>{monster_cell}</div>
-                          <div style="text-align:right;">{fmt_int(row["KPH"])}</div>
-                          <div style="text-align:right;">{row["ETA"]}</div>
-                        </div>
-                        '''
-                    )
-
-                st.markdown("".join(rows_html), unsafe_allow_html=True)
-
-        st.divider()
-
-csv_bytes = df_to_csv_bytes(
-    current_df if current_df is not None and not current_df.empty else pd.DataFrame()
-)
+st.markdown("---\n## Zone Averages")
+
+if agg_df.empty:
+    st.table(pd.DataFrame())
+    current_df = agg_df
+else:
+    # Orden de aggregate_by_zone (Balance/h desc); reordenar por columna se hace en el
+    # navegador con el sort nativo de st.dataframe, sin rerun.
+    current_df = agg_df
+
+    # Tabla completa en un único st.dataframe; la fila seleccionada abre su detalle
+    # (sin un botón/contenedor por zona).
+    table_cols = [
+        c for c in ("Zone", "Hunts", "Hours", "Balance (avg/h)", "Raw XP Gain (avg/h)", "Stamina (avg/h)")
+        if c in current_df.columns
+    ]
+    # Enteros/horas con format strings de pandas (sin try/except por celda):
+    # "," de miles → "." y NaN → "".
+    table_fmt = {c: ("{:,.2f}" if c == "Hours" else "{:,.0f}") for c in table_cols if c != "Zone"}
+    event = st.dataframe(
+        current_df[table_cols].style.format(table_fmt, thousands=".", na_rep=""),
+        column_config={"Zone": st.column_config.TextColumn("Zone", width="large")},
+        hide_index=True,
+        use_container_width=True,
+        selection_mode="single-row",
+        on_select="rerun",
+        key="za_tbl",
+    )
+
+    selected_rows = event.selection.rows if event is not None else []
+    if selected_rows:
+        zone_name = str(current_df["Zone"].iloc[selected_rows[0]])
+        st.markdown(f"#### More details — {zone_name}")
+        with st.container(border=True):
+            _render_zone_details(zone_name)
+    else:
+        st.caption("Select a zone in the table to see more details.")
+
+has_rows = current_df is not None and not current_df.empty
+csv_bytes = _zone_csv(*filter_sig) if has_rows else b""
 st.download_button(
     label="Export CSV",
     data=csv_bytes,
     file_name="tibia_analyzer_aggregated.csv",
     mime="text/csv",
-    disabled=current_df is None or current_df.empty,
+    disabled=not has_rows,
 )
@@ -1,15 +1,18 @@
 from __future__ import annotations
 from typing import List, Dict, Callable, Optional, Tuple
-import re
 import json
+import heapq
 
 import pandas as pd
 import streamlit as st
 
-from ta_core.normalizer import normalize_records
-from ta_core.repository import load_store, save_store
+from ta_core.repository import save_store
 from ta_core.services.auth_service import current_user_id
 from ta_core.auth_repo import get_role, get_profile
+from ta_core.levels import LEVEL_BUCKETS
+from ta_core.normalizer import record_key
+from ta_core.party_balance import parse_real_balance
+from utils.data import load_normalized_store, invalidate_store_cache
 
 
 # ===== CSS (table alignment) =====
@@ -30,88 +33,6 @@ VOCATION_OPTIONS = ["Knight", "Paladin", "Druid", "Sorcerer", "Monk"]
 MODE_OPTIONS = ["Solo", "Duo", "TH"]
 TH_MEMBER_OPTIONS = ["Knight", "Paladin", "Druid", "Sorcerer", "Monk", "none"]
 
-def make_level_buckets() -> List[str]:
-    buckets = ["8-25", "26-50", "51-75", "76-100"]
-    start = 101
-    while start <= 951:
-        end = start + 49
-        buckets.append(f"{start}-{end}")
-        start = end + 1
-    buckets.append("951-1000")
-    start = 1001
-    while start <= 1901:
-        end = start + 99
-        buckets.append(f"{start}-{end}")
-        start = end + 1
-    return buckets
-
-LEVEL_BUCKETS = make_level_buckets()
-
-TRANSFER_POS_PAT = re.compile(r"(received|get|from|credit|deposit)", re.I)
-TRANSFER_NEG_PAT = re.compile(r"(paid|sent|to|debit|withdraw)", re.I)
-NUMBER_PAT = re.compile(r"[-+]?\d{1,3}(?:[.,]\d{3})*(?:[.,]\d+)?|[-+]?\d+")
-
-
-def parse_real_balance(text: str) -> int:
-    lines = text.splitlines()
-
-    def to_int(s: str) -> int:
-        s = s.replace(".", "").replace(",", "")
-        try:
-            return int(s)
-        except Exception:
-            return 0
-
-    # 1) Party Hunt con 'Balance:' total + balances por jugador
-    session_total = None
-    member_count = 0
-    balance_re = re.compile(r"Balance\s*:\s*([-+]?\d{1,3}(?:[.,]\d{3})*(?:[.,]\d+)?|[-+]?\d+)", re.I)
-
-    for line in lines:
-        m = balance_re.search(line)
-        if not m:
-            continue
-        val = to_int(m.group(1))
-        indent = len(line) - len(line.lstrip())
-        if indent == 0 and session_total is None:
-            session_total = val
-        else:
-            member_count += 1
-
-    if session_total is not None:
-        divisor = member_count if member_count > 0 else 1
-        return int(round(session_total / divisor))
-
-    # 2) Transferencias
-    total = 0
-    for line in lines:
-        has_pos = bool(TRANSFER_POS_PAT.search(line))
-        has_neg = bool(TRANSFER_NEG_PAT.search(line))
-        if not (has_pos or has_neg):
-            continue
-        nums = NUMBER_PAT.findall(line)
-        if not nums:
-            continue
-        amount = to_int(nums[0])
-        if has_neg and not has_pos:
-            total -= amount
-        elif has_pos and not has_neg:
-            total += amount
-        else:
-            # Si hay palabras positivas y negativas en la misma línea,
-            # asumimos positivo si la primera coincidencia es positiva.
-            # (heurística simple)
-            first_pos = TRANSFER_POS_PAT.search(line)
-            first_neg = TRANSFER_NEG_PAT.search(line)
-            if first_pos and first_neg:
-                total += amount if first_pos.start() < first_neg.start() else -amount
-            elif first_pos:
-                total += amount
-            else:
-                total -= amount
-    return total
-
-
 # ---------- formatting helpers ----------
 def fmt_int(val):
     if pd.isna(val):
@@ -125,11 +46,14 @@ def fmt_int(val):
 def title_monster(name: str) -> str:
     return (str(name).strip().title()) if name else ""
 
+# Una sola lista de estilos para todas las tablas; 'td' centra las celdas sin CSS por celda
+_CENTER_STYLES = [
+    {"selector": "th", "props": [("text-align", "center")]},
+    {"selector": "td", "props": [("text-align", "center")]},
+]
+
 def style_center(df: pd.DataFrame, fmt_map: Dict[str, Callable] | None = None, hide_index: bool = True):
-    sty = df.style.set_table_styles([
-        {"selector": "th", "props": [("text-align", "center")]},
-        {"selector": "td", "props": [("text-align", "center")]},
-    ]).set_properties(**{"text-align": "center"})
+    sty = df.style.set_table_styles(_CENTER_STYLES)
     if fmt_map:
         sty = sty.format(fmt_map)
     if hide_index:
@@ -146,21 +70,19 @@ def style_center(df: pd.DataFrame, fmt_map: Dict[str, Callable] | None = None, h
 # =========================
 # Load data
 # =========================
-store: List[Dict] = load_store()
-raw_records: List[Dict] = store
-norm_df, pending_df = normalize_records(raw_records)
+# Cacheado por mtime del store; se invalida tras cada save_store()
+store, norm_df, pending_df = load_normalized_store()
 
 
 # ===== Helpers to map store rows =====
 def row_key_from_store_item(orig: Dict) -> tuple:
-    o_start = str(orig.get("Session start", orig.get("session_start", "")))
-    o_end = str(orig.get("Session end", orig.get("session_end", "")))
-    xo_raw = str(orig.get("XP Gain", orig.get("xp_gain", 0))).replace(",", "")
-    try:
-        xo = int(xo_raw)
-    except Exception:
-        xo = 0
-    return (o_start, o_end, xo)
+    # Mismo parser que el normalizador (alias + _to_int): casa con row_key_from_norm_row*
+    return record_key(orig)
+
+# Índice clave → hunts del store (en orden), una pasada por rerun; Save/Delete/owner son O(1) por clic
+store_by_key: Dict[tuple, List[Dict]] = {}
+for _orig in store:
+    store_by_key.setdefault(row_key_from_store_item(_orig), []).append(_orig)
 
 def row_key_from_norm_row(row: pd.Series) -> tuple:
     s_start = str(row.get("session_start", ""))
@@ -181,11 +103,8 @@ def _pick_owner(d: Dict) -> Optional[str]:
 
 def owner_id_for_row(row: pd.Series) -> Optional[str]:
     """Busca el hunt original en store y lee su owner."""
-    rk = row_key_from_norm_row(row)
-    for orig in store:
-        if row_key_from_store_item(orig) == rk:
-            return _pick_owner(orig)
-    return None
+    matches = store_by_key.get(row_key_from_norm_row(row))
+    return _pick_owner(matches[0]) if matches else None
 
 def username_of(user_id: Optional[str]) -> str:
     if not user_id:
@@ -236,14 +155,14 @@ groups: Dict[str, pd.DataFrame] = {}
 no_owners = pending_df["owner_id"].isna().all() if not pending_df.empty else True
 if not pending_df.empty:
     for uname, sub in pending_df.groupby(pending_df["username"].fillna("unknown")):
-        groups[str(uname)] = sub.copy()
+        groups[str(uname)] = sub  # groupby ya entrega frames nuevos
 
-# Filtrado
-view_df = pending_df.copy()
+# Filtrado: una única selección con .loc sobre pending_df (view_df solo se lee, sin copia previa)
+view_df = pending_df
 if not is_admin:
     if not no_owners:
         # Usuario normal con datos de dueño: filtrar por uid
-        view_df = view_df[view_df["owner_id"] == uid]
+        view_df = pending_df.loc[pending_df["owner_id"] == uid]
     # Si no hay dueños, no filtramos (fallback)
 
     if view_df.empty:
@@ -261,7 +180,7 @@ else:
         help="Show only one user's pending files or all users",
     )
     if selected != "All":
-        view_df = view_df[view_df["username"] == selected]
+        view_df = pending_df.loc[pending_df["username"] == selected]
 
     if view_df.empty:
         st.write("No data available")
@@ -273,6 +192,12 @@ else:
 # =========================
 # Vistas por fila
 # =========================
+def _kill_count(m: Dict) -> int:
+    try:
+        return int(str(m.get("Count", 0)).replace(",", ""))
+    except Exception:
+        return 0
+
 def top3_monsters(sr: Dict) -> List[str]:
     if isinstance(sr, str):
         try:
@@ -284,39 +209,25 @@ def top3_monsters(sr: Dict) -> List[str]:
     km = sr.get("Killed Monsters") or sr.get("killed_monsters") or sr.get("monsters") or []
     top = []
     if isinstance(km, list):
-        try:
-            km_sorted = sorted(km, key=lambda x: int(str(x.get("Count", 0)).replace(",", "")), reverse=True)
-        except Exception:
-            km_sorted = km
-        for m in km_sorted[:3]:
+        # nlargest: O(N) para quedarse con 3, mismo orden que sorted(..., reverse=True)[:3]
+        for m in heapq.nlargest(3, (m for m in km if isinstance(m, dict)), key=_kill_count):
             name = title_monster(m.get("Name") or m.get("name") or "?")
-            try:
-                cnt = int(str(m.get("Count", 0)).replace(",", ""))
-            except Exception:
-                cnt = 0
-            top.append(f"{name} ({fmt_int(cnt)})")
+            top.append(f"{name} ({fmt_int(_kill_count(m))})")
     while len(top) < 3:
         top.append("")
-    return top[:3]
-
-def pending_minitable(df_row: pd.DataFrame) -> pd.DataFrame:
-    r = df_row.copy()
-    m1, m2, m3 = [], [], []
-    try:
-        sr = r.iloc[0].get("source_raw", {})
-        top = top3_monsters(sr)
-        m1, m2, m3 = [top[0]], [top[1]], [top[2]]
-    except Exception:
-        pass
-    view = pd.DataFrame({
-        "Raw XP Gain": r.get("raw_xp_gain"),
-        "XP Gain": r.get("xp_gain"),
-        "Balance": r.get("balance"),
-        "Monster 1": m1,
-        "Monster 2": m2,
-        "Monster 3": m3,
-    })
-    return view
+    return top
+
+def pending_minitables(rows_df: pd.DataFrame) -> pd.DataFrame:
+    """Mini-tabla (XP/Balance + top 3 monstruos) de todas las filas a la vez, mismo índice que rows_df."""
+    out = pd.DataFrame({
+        "Raw XP Gain": rows_df.get("raw_xp_gain"),
+        "XP Gain": rows_df.get("xp_gain"),
+        "Balance": rows_df.get("balance"),
+    }, index=rows_df.index)
+    src = rows_df["source_raw"] if "source_raw" in rows_df.columns else pd.Series({}, index=rows_df.index, dtype=object)
+    tops = src.map(top3_monsters).tolist()
+    monsters = pd.DataFrame(tops, columns=["Monster 1", "Monster 2", "Monster 3"], index=rows_df.index)
+    return out.join(monsters)
 
 def row_key_from_norm_row_strict(row: pd.Series) -> Tuple[str, str, int]:
     s_start = str(row.get("session_start", ""))
@@ -327,131 +238,153 @@ def row_key_from_norm_row_strict(row: pd.Series) -> Tuple[str, str, int]:
         xp = 0
     return (s_start, s_end, xp)
 
+# Zonas ya usadas (una vez por rerun, no una vez por fila)
+EXISTING_ZONES = sorted({z for z in norm_df.get("zona", pd.Series(dtype=str)).unique() if str(z).strip()})
+
+@st.fragment
+def _render_pending_row(mini_df: pd.DataFrame, row: pd.Series, idx: int) -> None:
+    """Editor de una hunt pendiente. Sus widgets solo re-ejecutan este fragment (los del
+    form, ni eso hasta Save); Save/Delete cambian la lista de pendientes y hacen rerun de toda la página."""
+    st.table(style_center(mini_df, {"Raw XP Gain": fmt_int, "XP Gain": fmt_int, "Balance": fmt_int}))
+
+    st.markdown("---")
+    # Mode y Zone fuera del form: deciden qué campos se muestran (Duo/TH, real balance,
+    # texto libre de zona), así que necesitan rerun al cambiar
+    cm, cz, _ = st.columns([0.25, 0.25, 0.5])
+    with cm:
+        try:
+            mode_idx = MODE_OPTIONS.index(row.get("mode", "Solo"))
+        except ValueError:
+            mode_idx = 0
+        new_mode = st.selectbox("Mode", MODE_OPTIONS, index=mode_idx, key=f"mode_{row.get('session_start')}_{idx}")
+    with cz:
+        zone_opts = ["(type)", *EXISTING_ZONES]
+        start_zone = row.get("zona") if row.get("zona") in zone_opts else "(type)"
+        zone_choice = st.selectbox("Zone", zone_opts, index=zone_opts.index(start_zone), key=f"zone_sel_{row.get('session_start')}_{idx}")
+
+    if new_mode != "Solo":
+        if st.button("Compute real balance", key=f"open_rb_{row.get('session_start')}_{idx}"):
+            st.session_state[f"show_rb_{row.get('session_start')}_{idx}"] = True
+
+        # ⬇️ FIX: sustituido expander anidado por container (evita StreamlitAPIException)
+        if st.session_state.get(f"show_rb_{row.get('session_start')}_{idx}", False):
+            with st.container(border=True):
+                st.markdown("#### Compute real balance")
+                txt = st.text_area("Paste Party Hunt / Transfers text", height=200, key=f"ta_{row.get('session_start')}_{idx}")
+                cols_rb = st.columns([1, 1, 8])
+                with cols_rb[0]:
+                    if st.button("Compute & apply", key=f"apply_{row.get('session_start')}_{idx}"):
+                        real = parse_real_balance(txt)
+                        st.session_state[f"calc_balance_{row.get('session_start')}_{idx}"] = real
+                        st.session_state[f"transfer_text_{row.get('session_start')}_{idx}"] = txt
+                        st.session_state[f"show_rb_{row.get('session_start')}_{idx}"] = False
+                        st.rerun(scope="fragment")
+                with cols_rb[1]:
+                    if st.button("Close", key=f"close_rb_{row.get('session_start')}_{idx}"):
+                        st.session_state[f"show_rb_{row.get('session_start')}_{idx}"] = False
+                        st.rerun(scope="fragment")
+
+        calc_val = st.session_state.get(f"calc_balance_{row.get('session_start')}_{idx}")
+        if calc_val is not None:
+            st.success(f"Real balance: {fmt_int(calc_val)}")
+    else:
+        for key in [
+            f"show_rb_{row.get('session_start')}_{idx}",
+            f"calc_balance_{row.get('session_start')}_{idx}",
+            f"transfer_text_{row.get('session_start')}_{idx}",
+        ]:
+            st.session_state.pop(key, None)
+
+    # Resto de campos en un form: no hay rerun hasta pulsar Save
+    with st.form(key=f"edit_{row.get('session_start')}_{idx}", border=False):
+        c1, c2, c3 = st.columns(3)
+        with c1:
+            try:
+                voc_idx = VOCATION_OPTIONS.index(row.get("vocation", "Knight"))
+            except ValueError:
+                voc_idx = 0
+            new_voc = st.selectbox("Vocation", VOCATION_OPTIONS, index=voc_idx, key=f"voc_{row.get('session_start')}_{idx}")
+        with c2:
+            if zone_choice == "(type)":
+                new_zone = st.text_input("Zone (free text)", value=row.get("zona", ""), key=f"zone_text_{row.get('session_start')}_{idx}")
+            else:
+                new_zone = zone_choice
+        with c3:
+            try:
+                lvl_idx = LEVEL_BUCKETS.index(row.get("level_bucket", LEVEL_BUCKETS[0]))
+            except ValueError:
+                lvl_idx = 0
+            new_level = st.selectbox("Level", LEVEL_BUCKETS, index=lvl_idx, key=f"lvl_{row.get('session_start')}_{idx}")
+
+        duo_voc = None
+        th_members = None
+        if new_mode == "Duo":
+            duo_voc = st.selectbox("Duo Vocation", VOCATION_OPTIONS, key=f"duo_voc_{row.get('session_start')}_{idx}")
+        elif new_mode == "TH":
+            st.markdown("#### Party Members")
+            cth1, cth2, cth3, cth4 = st.columns(4)
+            with cth1: m1 = st.selectbox("Member 1", TH_MEMBER_OPTIONS, key=f"th1_{row.get('session_start')}_{idx}")
+            with cth2: m2 = st.selectbox("Member 2", TH_MEMBER_OPTIONS, key=f"th2_{row.get('session_start')}_{idx}")
+            with cth3: m3 = st.selectbox("Member 3", TH_MEMBER_OPTIONS, key=f"th3_{row.get('session_start')}_{idx}")
+            with cth4: m4 = st.selectbox("Member 4", TH_MEMBER_OPTIONS, key=f"th4_{row.get('session_start')}_{idx}")
+            th_members = [m1, m2, m3, m4]
+
+        submitted = st.form_submit_button("💾 Save this row")
+
+    if submitted:
+        matches = store_by_key.get(row_key_from_norm_row_strict(row))
+        if not matches:
+            st.error("Could not find this hunt in the store; nothing was saved.")
+        else:
+            orig = matches[0]
+            orig["Vocation"], orig["Mode"], orig["Zona"], orig["Level"] = new_voc, new_mode, new_zone, new_level
+            if duo_voc is not None:
+                orig["Vocation duo"] = duo_voc
+            if th_members is not None:
+                orig["Party Members"] = th_members
+            calc_key = f"calc_balance_{row.get('session_start')}_{idx}"
+            if st.session_state.get(calc_key) is not None:
+                orig["Balance"] = int(st.session_state[calc_key])
+                orig["Balance Real"] = int(st.session_state[calc_key])
+                orig["Transfer"] = st.session_state.get(f"transfer_text_{row.get('session_start')}_{idx}", "")
+            save_store(store)
+            invalidate_store_cache()
+            st.success("Row saved. Recomputing…")
+            st.rerun()
+
+    cbtn1, cbtn2 = st.columns([0.5, 0.5])
+    with cbtn1:
+        if st.button("➕ Add Supplies", key=f"add_sup_{row.get('session_start')}_{idx}"):
+            st.session_state[f"show_supplies_{row.get('session_start')}_{idx}"] = True
+        # ⬇️ FIX: sustituido expander anidado por container (evita StreamlitAPIException)
+        if st.session_state.get(f"show_supplies_{row.get('session_start')}_{idx}", False):
+            with st.container(border=True):
+                st.markdown("#### Add Supplies")
+                st.write("WIP")
+                if st.button("Close", key=f"close_sup_{row.get('session_start')}_{idx}"):
+                    st.session_state[f"show_supplies_{row.get('session_start')}_{idx}"] = False
+                    st.rerun(scope="fragment")
+    with cbtn2:
+        if st.button("🗑️ Delete hunt", key=f"del_{row.get('session_start')}_{idx}"):
+            doomed = {id(it) for it in store_by_key.get(row_key_from_norm_row_strict(row), [])}
+            new_store = [it for it in store if id(it) not in doomed]
+            save_store(new_store)
+            invalidate_store_cache()
+            st.success("Hunt deleted. Recomputing…")
+            st.rerun()
+
+
 def render_rows(rows_df: pd.DataFrame) -> None:
     if rows_df.empty:
         st.write("No data available")
         return
 
-    for idx, row in rows_df.reset_index(drop=True).iterrows():
+    rows_df = rows_df.reset_index(drop=True)
+    minis = pending_minitables(rows_df)  # top 3 de monstruos de todas las filas en una pasada
+    for idx, row in rows_df.iterrows():
         title = f"Edit: {row.get('path','(no name)')} — {row.get('session_start','')} → {row.get('session_end','')}"
         with st.expander(title):
-            row_df = pending_minitable(rows_df.iloc[[idx]]).reset_index(drop=True)
-            st.table(style_center(row_df, {"Raw XP Gain": fmt_int, "XP Gain": fmt_int, "Balance": fmt_int}))
-
-            st.markdown("---")
-            c1, c2, c3, c4 = st.columns(4)
-            with c1:
-                try:
-                    voc_idx = VOCATION_OPTIONS.index(row.get("vocation", "Knight"))
-                except ValueError:
-                    voc_idx = 0
-                new_voc = st.selectbox("Vocation", VOCATION_OPTIONS, index=voc_idx, key=f"voc_{row.get('session_start')}_{idx}")
-            with c2:
-                try:
-                    mode_idx = MODE_OPTIONS.index(row.get("mode", "Solo"))
-                except ValueError:
-                    mode_idx = 0
-                new_mode = st.selectbox("Mode", MODE_OPTIONS, index=mode_idx, key=f"mode_{row.get('session_start')}_{idx}")
-            with c3:
-                existing_zones = sorted({z for z in norm_df.get("zona", pd.Series(dtype=str)).unique() if str(z).strip()})
-                zone_opts = ["(type)", *existing_zones]
-                start_zone = row.get("zona") if row.get("zona") in zone_opts else "(type)"
-                zone_choice = st.selectbox("Zone", zone_opts, index=zone_opts.index(start_zone), key=f"zone_sel_{row.get('session_start')}_{idx}")
-                if zone_choice == "(type)":
-                    new_zone = st.text_input("Zone (free text)", value=row.get("zona", ""), key=f"zone_text_{row.get('session_start')}_{idx}")
-                else:
-                    new_zone = zone_choice
-            with c4:
-                try:
-                    lvl_idx = LEVEL_BUCKETS.index(row.get("level_bucket", LEVEL_BUCKETS[0]))
-                except ValueError:
-                    lvl_idx = 0
-                new_level = st.selectbox("Level", LEVEL_BUCKETS, index=lvl_idx, key=f"lvl_{row.get('session_start')}_{idx}")
-
-            duo_voc = None
-            th_members = None
-            if new_mode == "Duo":
-                duo_voc = st.selectbox("Duo Vocation", VOCATION_OPTIONS, key=f"duo_voc_{row.get('session_start')}_{idx}")
-            elif new_mode == "TH":
-                st.markdown("#### Party Members")
-                cth1, cth2, cth3, cth4 = st.columns(4)
-                with cth1: m1 = st.selectbox("Member 1", TH_MEMBER_OPTIONS, key=f"th1_{row.get('session_start')}_{idx}")
-                with cth2: m2 = st.selectbox("Member 2", TH_MEMBER_OPTIONS, key=f"th2_{row.get('session_start')}_{idx}")
-                with cth3: m3 = st.selectbox("Member 3", TH_MEMBER_OPTIONS, key=f"th3_{row.get('session_start')}_{idx}")
-                with cth4: m4 = st.selectbox("Member 4", TH_MEMBER_OPTIONS, key=f"th4_{row.get('session_start')}_{idx}")
-                th_members = [m1, m2, m3, m4]
-
-            if new_mode != "Solo":
-                if st.button("Compute real balance", key=f"open_rb_{row.get('session_start')}_{idx}"):
-                    st.session_state[f"show_rb_{row.get('session_start')}_{idx}"] = True
-
-                # ⬇️ FIX: sustituido expander anidado por container (evita StreamlitAPIException)
-                if st.session_state.get(f"show_rb_{row.get('session_start')}_{idx}", False):
-                    with st.container(border=True):
-                        st.markdown("#### Compute real balance")
-                        txt = st.text_area("Paste Party Hunt / Transfers text", height=200, key=f"ta_{row.get('session_start')}_{idx}")
-                        cols_rb = st.columns([1, 1, 8])
-                        with cols_rb[0]:
-                            if st.button("Compute & apply", key=f"apply_{row.get('session_start')}_{idx}"):
-                                real = parse_real_balance(txt)
-                                st.session_state[f"calc_balance_{row.get('session_start')}_{idx}"] = real
-                                st.session_state[f"transfer_text_{row.get('session_start')}_{idx}"] = txt
-                                st.session_state[f"show_rb_{row.get('session_start')}_{idx}"] = False
-                                st.rerun()
-                        with cols_rb[1]:
-                            if st.button("Close", key=f"close_rb_{row.get('session_start')}_{idx}"):
-                                st.session_state[f"show_rb_{row.get('session_start')}_{idx}"] = False
-                                st.rerun()
-
-                calc_val = st.session_state.get(f"calc_balance_{row.get('session_start')}_{idx}")
-                if calc_val is not None:
-                    st.success(f"Real balance: {fmt_int(calc_val)}")
-            else:
-                for key in [
-                    f"show_rb_{row.get('session_start')}_{idx}",
-                    f"calc_balance_{row.get('session_start')}_{idx}",
-                    f"transfer_text_{row.get('session_start')}_{idx}",
-                ]:
-                    st.session_state.pop(key, None)
-
-            cbtn1, cbtn2, cbtn3 = st.columns([0.34, 0.33, 0.33])
-            with cbtn1:
-                if st.button("💾 Save this row", key=f"save_{row.get('session_start')}_{idx}"):
-                    s_start, s_end, xp_orig = row_key_from_norm_row_strict(row)
-                    for orig in store:
-                        if row_key_from_store_item(orig) == (s_start, s_end, xp_orig):
-                            orig["Vocation"], orig["Mode"], orig["Zona"], orig["Level"] = new_voc, new_mode, new_zone, new_level
-                            if duo_voc is not None:
-                                orig["Vocation duo"] = duo_voc
-                            if th_members is not None:
-                                orig["Party Members"] = th_members
-                            calc_key = f"calc_balance_{row.get('session_start')}_{idx}"
-                            if st.session_state.get(calc_key) is not None:
-                                orig["Balance"] = int(st.session_state[calc_key])
-                                orig["Balance Real"] = int(st.session_state[calc_key])
-                                orig["Transfer"] = st.session_state.get(f"transfer_text_{row.get('session_start')}_{idx}", "")
-                            break
-                    save_store(store)
-                    st.success("Row saved. Recomputing…")
-                    st.rerun()
-            with cbtn2:
-                if st.button("➕ Add Supplies", key=f"add_sup_{row.get('session_start')}_{idx}"):
-                    st.session_state[f"show_supplies_{row.get('session_start')}_{idx}"] = True
-                # ⬇️ FIX: sustituido expander anidado por container (evita StreamlitAPIException)
-                if st.session_state.get(f"show_supplies_{row.get('session_start')}_{idx}", False):
-                    with st.container(border=True):
-                        st.markdown("#### Add Supplies")
-                        st.write("WIP")
-                        if st.button("Close", key=f"close_sup_{row.get('session_start')}_{idx}"):
-                            st.session_state[f"show_supplies_{row.get('session_start')}_{idx}"] = False
-                            st.rerun()
-            with cbtn3:
-                if st.button("🗑️ Delete hunt", key=f"del_{row.get('session_start')}_{idx}"):
-                    s_start, s_end, xp_orig = row_key_from_norm_row_strict(row)
-                    new_store = [it for it in store if row_key_from_store_item(it) != (s_start, s_end, xp_orig)]
-                    save_store(new_store)
-                    st.success("Hunt deleted. Recomputing…")
-                    st.rerun()
+            _render_pending_row(minis.iloc[[idx]].reset_index(drop=True), row, idx)
 
 
 # ---- Pintado final ----
@@ -1,11 +1,12 @@
 # app_pages/4_Statistics.py
 from __future__ import annotations
+import numpy as np
 import pandas as pd
+from pandas.api.types import CategoricalDtype
 import streamlit as st
 import altair as alt
 
-from ta_core.repository import ensure_data_dirs, load_store
-from ta_core.normalizer import normalize_records
+from utils.data import load_normalized_store, store_signature
 
 # ── Helpers ──
 def fmt_int(val) -> str:
@@ -22,6 +23,15 @@ def fmt_duration_hm(hours_float: float) -> str:
     if h:       return f"{h}h"
     return f"{m}min"
 
+def fmt_duration_hm_vec(hours: np.ndarray) -> list[str]:
+    # Igual que fmt_duration_hm, con el redondeo/divmod hecho en NumPy de una vez
+    total_min = np.rint(np.nan_to_num(np.asarray(hours, dtype=float)) * 60).astype(int)
+    h, m = np.divmod(total_min, 60)
+    return [
+        f"{H}h {M}min" if H and M else f"{H}h" if H else f"{M}min"
+        for H, M in zip(h.tolist(), m.tolist())
+    ]
+
 def level_key(s: str) -> int:
     # Ordena "26-50", "51-75", "101-150", etc.
     try:
@@ -85,106 +95,97 @@ VOC_COLORS  = ["#4E79A7", "#59A14F", "#F28E2B", "#EDC948", "#E15759"]
 MODES       = ["Solo", "Duo", "TH"]
 MODE_COLORS = ["#4E79A7", "#59A14F", "#E15759"]
 
-# ── Datos base ──
-ensure_data_dirs()
-store = load_store()
-norm_df, _ = normalize_records(store)
+def group_stats(df: pd.DataFrame, col: str, index: list[str], zona_codes=None) -> pd.DataFrame:
+    """
+    Hunts / horas / zonas únicas por categoría. `col` es category con categorías == `index`:
+    sus códigos son el carril de cada fila y todo sale de np.bincount (un bucle en C).
+    """
+    out = pd.DataFrame({"hunts": 0, "hours": 0.0, "places": 0}, index=pd.Index(index, dtype=object))
+    if col not in df.columns or not index:
+        return out
+    n = len(index)
+    codes = df[col].cat.codes.to_numpy()
+    valid = codes >= 0  # -1 = fuera de las categorías / NaN
+    lanes = codes[valid]
+    out["hunts"] = np.bincount(lanes, minlength=n)
+    if "duration_sec" in df.columns:
+        sec = np.nan_to_num(df["duration_sec"].to_numpy(dtype=float, na_value=np.nan)[valid])  # ignora NaN como sum()
+        out["hours"] = np.bincount(lanes, weights=sec, minlength=n) / 3600.0
+    if zona_codes is not None:
+        zc = zona_codes[valid]
+        has_zone = zc >= 0
+        n_zones = max(int(zc.max()) + 1, 1) if len(zc) else 1
+        # Pares (categoría, zona) únicos → cuántas zonas distintas por categoría
+        pairs = np.unique(lanes[has_zone].astype(np.int64) * n_zones + zc[has_zone])
+        out["places"] = np.bincount(pairs // n_zones, minlength=n)
+    return out
 
-st.title("Statistics")
+def donut_df(stats: pd.DataFrame, src_col: str, value_col: str, with_hm: bool = False) -> pd.DataFrame:
+    df = pd.DataFrame({"Label": stats.index, value_col: stats[src_col].to_numpy()})
+    if with_hm:
+        df["HoursHM"] = fmt_duration_hm_vec(df[value_col].to_numpy())
+    df["pct"] = df[value_col] / max(float(df[value_col].sum()), 1.0)
+    return df
 
-if norm_df.empty:
-    st.info("No processed data yet.")
-    st.stop()
+@st.cache_data(show_spinner=False, max_entries=2)
+def _stats_tables(store_sig: tuple[int, int]) -> dict:
+    """
+    Totales + tablas de los 9 donuts, calculados una vez por versión del store
+    (store_sig = mtime/tamaño de store.jsonl). Los reruns solo construyen los charts.
+    """
+    _, norm_df, _ = load_normalized_store()
+    tables: dict = {"total_hunts": len(norm_df), "total_hours": 0.0, "total_places": 0, "levels": []}
+    if norm_df.empty:
+        return tables
 
-# Totales
-total_hunts  = len(norm_df)
-total_hours  = (norm_df["duration_sec"].sum() / 3600.0) if "duration_sec" in norm_df.columns else 0.0
-total_places = norm_df["zona"].nunique() if "zona" in norm_df.columns else 0
+    if "duration_sec" in norm_df.columns:
+        tables["total_hours"] = norm_df["duration_sec"].sum() / 3600.0
 
-# ======= HUNTS =======
-# By vocation
-voc_hunts = (
-    norm_df["vocation"].value_counts().reindex(VOCATIONS, fill_value=0).astype(int)
-    if "vocation" in norm_df.columns else pd.Series([0]*len(VOCATIONS), index=VOCATIONS, dtype=int)
-)
-hunts_voc_df = pd.DataFrame({"Label": voc_hunts.index, "Hunts": voc_hunts.values})
-hunts_voc_df["pct"] = hunts_voc_df["Hunts"] / max(int(hunts_voc_df["Hunts"].sum()), 1)
+    # zona factorizada una vez a códigos enteros (-1 = zona vacía, no cuenta como lugar)
+    zona_codes = None
+    if "zona" in norm_df.columns:
+        zona_codes, zona_uniques = pd.factorize(norm_df["zona"])
+        tables["total_places"] = len(zona_uniques)
 
-# By mode
-mode_hunts = (
-    norm_df["mode"].value_counts().reindex(MODES, fill_value=0).astype(int)
-    if "mode" in norm_df.columns else pd.Series([0]*len(MODES), index=MODES, dtype=int)
-)
-hunts_mode_df = pd.DataFrame({"Label": mode_hunts.index, "Hunts": mode_hunts.values})
-hunts_mode_df["pct"] = hunts_mode_df["Hunts"] / max(int(hunts_mode_df["Hunts"].sum()), 1)
-
-# By level bucket (ordenado por límite inferior)
-levels_present = sorted(
-    [str(x) for x in norm_df.get("level_bucket", pd.Series(dtype=str)).dropna().unique()],
-    key=level_key
-)
-level_hunts = (
-    norm_df["level_bucket"].value_counts().reindex(levels_present, fill_value=0).astype(int)
-    if "level_bucket" in norm_df.columns else pd.Series(dtype=int)
-)
-hunts_lvl_df = pd.DataFrame({"Label": level_hunts.index if not level_hunts.empty else [], "Hunts": level_hunts.values if not level_hunts.empty else []})
-if not hunts_lvl_df.empty:
-    hunts_lvl_df["pct"] = hunts_lvl_df["Hunts"] / max(int(hunts_lvl_df["Hunts"].sum()), 1)
+    # Columnas de agrupación como category: sus códigos son los carriles de group_stats.
+    # Valores fuera de las paletas fijas quedan como NaN (no se pintaban igualmente).
+    if "vocation" in norm_df.columns:
+        norm_df["vocation"] = norm_df["vocation"].astype(CategoricalDtype(VOCATIONS))
+    if "mode" in norm_df.columns:
+        norm_df["mode"] = norm_df["mode"].astype(CategoricalDtype(MODES))
 
-# ======= HOURS =======
-# By vocation
-voc_hours = (
-    norm_df.groupby("vocation")["duration_sec"].sum().div(3600.0).reindex(VOCATIONS, fill_value=0.0)
-    if {"vocation","duration_sec"}.issubset(norm_df.columns) else pd.Series([0.0]*len(VOCATIONS), index=VOCATIONS, dtype=float)
-)
-hours_voc_df = pd.DataFrame({"Label": voc_hours.index, "Hours": voc_hours.values})
-hours_voc_df["HoursHM"] = hours_voc_df["Hours"].apply(fmt_duration_hm)
-hours_voc_df["pct"] = hours_voc_df["Hours"] / max(float(hours_voc_df["Hours"].sum()), 1.0)
+    # By level bucket (ordenado por límite inferior)
+    levels_present: list[str] = []
+    if "level_bucket" in norm_df.columns:
+        lvl = norm_df["level_bucket"].dropna().astype(str)
+        levels_present = sorted(lvl.unique().tolist(), key=level_key)
+        norm_df["level_bucket"] = norm_df["level_bucket"].astype(CategoricalDtype(levels_present))
+    tables["levels"] = levels_present
 
-# By mode
-mode_hours = (
-    norm_df.groupby("mode")["duration_sec"].sum().div(3600.0).reindex(MODES, fill_value=0.0)
-    if {"mode","duration_sec"}.issubset(norm_df.columns) else pd.Series([0.0]*len(MODES), index=MODES, dtype=float)
-)
-hours_mode_df = pd.DataFrame({"Label": mode_hours.index, "Hours": mode_hours.values})
-hours_mode_df["HoursHM"] = hours_mode_df["Hours"].apply(fmt_duration_hm)
-hours_mode_df["pct"] = hours_mode_df["Hours"] / max(float(hours_mode_df["Hours"].sum()), 1.0)
+    stats = {
+        "voc":  group_stats(norm_df, "vocation", VOCATIONS, zona_codes),
+        "mode": group_stats(norm_df, "mode", MODES, zona_codes),
+        "lvl":  group_stats(norm_df, "level_bucket", levels_present, zona_codes),
+    }
+    for key, st_df in stats.items():
+        tables[f"hunts_{key}"]  = donut_df(st_df, "hunts", "Hunts")
+        tables[f"hours_{key}"]  = donut_df(st_df, "hours", "Hours", with_hm=True)
+        tables[f"places_{key}"] = donut_df(st_df, "places", "Places")
+    return tables
 
-# By level bucket
-level_hours = (
-    norm_df.groupby("level_bucket")["duration_sec"].sum().div(3600.0).reindex(levels_present, fill_value=0.0)
-    if {"level_bucket","duration_sec"}.issubset(norm_df.columns) else pd.Series(dtype=float)
-)
-hours_lvl_df = pd.DataFrame({"Label": level_hours.index if not level_hours.empty else [], "Hours": level_hours.values if not level_hours.empty else []})
-if not hours_lvl_df.empty:
-    hours_lvl_df["HoursHM"] = hours_lvl_df["Hours"].apply(fmt_duration_hm)
-    hours_lvl_df["pct"] = hours_lvl_df["Hours"] / max(float(hours_lvl_df["Hours"].sum()), 1.0)
+# ── Datos base ── (cacheado por mtime/tamaño del store)
+tables = _stats_tables(store_signature())
 
-# ======= HUNT PLACES (zonas únicas) =======
-# By vocation
-voc_places = (
-    norm_df.dropna(subset=["zona"]).groupby("vocation")["zona"].nunique().reindex(VOCATIONS, fill_value=0).astype(int)
-    if {"vocation","zona"}.issubset(norm_df.columns) else pd.Series([0]*len(VOCATIONS), index=VOCATIONS, dtype=int)
-)
-places_voc_df = pd.DataFrame({"Label": voc_places.index, "Places": voc_places.values})
-places_voc_df["pct"] = places_voc_df["Places"] / max(int(places_voc_df["Places"].sum()), 1)
+st.title("Statistics")
 
-# By mode
-mode_places = (
-    norm_df.dropna(subset=["zona"]).groupby("mode")["zona"].nunique().reindex(MODES, fill_value=0).astype(int)
-    if {"mode","zona"}.issubset(norm_df.columns) else pd.Series([0]*len(MODES), index=MODES, dtype=int)
-)
-places_mode_df = pd.DataFrame({"Label": mode_places.index, "Places": mode_places.values})
-places_mode_df["pct"] = places_mode_df["Places"] / max(int(places_mode_df["Places"].sum()), 1)
+if not tables["total_hunts"]:
+    st.info("No processed data yet.")
+    st.stop()
 
-# By level bucket
-level_places = (
-    norm_df.dropna(subset=["zona"]).groupby("level_bucket")["zona"].nunique().reindex(levels_present, fill_value=0).astype(int)
-    if {"level_bucket","zona"}.issubset(norm_df.columns) else pd.Series(dtype=int)
-)
-places_lvl_df = pd.DataFrame({"Label": level_places.index if not level_places.empty else [], "Places": level_places.values if not level_places.empty else []})
-if not places_lvl_df.empty:
-    places_lvl_df["pct"] = places_lvl_df["Places"] / max(int(places_lvl_df["Places"].sum()), 1)
+total_hunts    = tables["total_hunts"]
+total_hours    = tables["total_hours"]
+total_places   = tables["total_places"]
+levels_present = tables["levels"]
 
 # ──────────────────────────────────────────────────────────────────────────────
 # SECTION: Total Hunts
@@ -198,17 +199,17 @@ st.markdown(
 hc1, hc2, hc3 = st.columns(3)
 with hc1:
     st.altair_chart(
-        donut_chart(hunts_voc_df, "Label", "Hunts", "Hunts by Vocation",
+        donut_chart(tables["hunts_voc"], "Label", "Hunts", "Hunts by Vocation",
                     domain=VOCATIONS, colors=VOC_COLORS),
         use_container_width=True)
 with hc2:
     st.altair_chart(
-        donut_chart(hunts_mode_df, "Label", "Hunts", "Hunts by Mode",
+        donut_chart(tables["hunts_mode"], "Label", "Hunts", "Hunts by Mode",
                     domain=MODES, colors=MODE_COLORS),
         use_container_width=True)
 with hc3:
     st.altair_chart(
-        donut_chart(hunts_lvl_df, "Label", "Hunts", "Hunts by Level",
+        donut_chart(tables["hunts_lvl"], "Label", "Hunts", "Hunts by Level",
                     domain=levels_present if levels_present else None,
                     scheme="tableau20"),
         use_container_width=True)
@@ -227,19 +228,19 @@ st.markdown(
 hc1, hc2, hc3 = st.columns(3)
 with hc1:
     st.altair_chart(
-        donut_chart(hours_voc_df, "Label", "Hours", "Hours by Vocation",
+        donut_chart(tables["hours_voc"], "Label", "Hours", "Hours by Vocation",
                     domain=VOCATIONS, colors=VOC_COLORS,
                     tooltip_text_col="HoursHM"),
         use_container_width=True)
 with hc2:
     st.altair_chart(
-        donut_chart(hours_mode_df, "Label", "Hours", "Hours by Mode",
+        donut_chart(tables["hours_mode"], "Label", "Hours", "Hours by Mode",
                     domain=MODES, colors=MODE_COLORS,
                     tooltip_text_col="HoursHM"),
         use_container_width=True)
 with hc3:
     st.altair_chart(
-        donut_chart(hours_lvl_df, "Label", "Hours", "Hours by Level",
+        donut_chart(tables["hours_lvl"], "Label", "Hours", "Hours by Level",
                     domain=levels_present if levels_present else None,
                     scheme="tableau20",
                     tooltip_text_col="HoursHM"),
@@ -259,17 +260,17 @@ st.markdown(
 hc1, hc2, hc3 = st.columns(3)
 with hc1:
     st.altair_chart(
-        donut_chart(places_voc_df, "Label", "Places", "Hunt Places by Vocation",
+        donut_chart(tables["places_voc"], "Label", "Places", "Hunt Places by Vocation",
                     domain=VOCATIONS, colors=VOC_COLORS),
         use_container_width=True)
 with hc2:
     st.altair_chart(
-        donut_chart(places_mode_df, "Label", "Places", "Hunt Places by Mode",
+        donut_chart(tables["places_mode"], "Label", "Places", "Hunt Places by Mode",
                     domain=MODES, colors=MODE_COLORS),
         use_container_width=True)
 with hc3:
     st.altair_chart(
-        donut_chart(places_lvl_df, "Label", "Places", "Hunt Places by Level",
+        donut_chart(tables["places_lvl"], "Label", "Places", "Hunt Places by Level",
                     domain=levels_present if levels_present else None,
                     scheme="tableau20"),
         use_container_width=True)
@@ -1,9 +1,7 @@
 # app_pages/8_Debug.py
 from __future__ import annotations
 import streamlit as st
-from ta_core.services.auth_service import (
-    signup, login, logout, current_user_id, get_supabase
-)
+from ta_core.services.auth_service import signup, login, logout, current_user_id
 from utils.debug_console import get_log_text, clear_log, set_debug_enabled, debug_enabled
 from ta_core.auth_repo import get_role
 
@@ -37,8 +35,7 @@ with colB:
 st.divider()
 
 # ---------- Estado de sesión ----------
-uid = current_user_id()
-st.write(f"**Current user id:** `{uid or 'None'}`")
+st.write(f"**Current user id:** `{_uid or 'None'}`")
 
 # ---------- Forms de prueba: Signup/Login ----------
 with st.expander("Sign up (test)", expanded=True):
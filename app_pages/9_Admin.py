@@ -1,11 +1,13 @@
 from __future__ import annotations
+from operator import itemgetter
+import numpy as np
 import pandas as pd
 import streamlit as st
 
 from utils.auth_guard import require_admin
-from ta_core.repository import load_store
-from ta_core.normalizer import normalize_records
-from ta_core.auth_repo import get_profile
+from utils.data import load_normalized_store, store_signature
+from ta_core.auth_repo import get_usernames
+from ta_core.repository import iter_store_fields
 
 # Import específico de la librería postgrest para capturar 204/errores
 try:
@@ -16,94 +18,122 @@ except Exception:  # si la import no existe en tu env, definimos un placeholder
 
 
 # ---------- Helpers ----------
-def _row_key_from_store_item(orig: dict) -> tuple[str, str, int]:
-    s_start = str(orig.get("Session start", orig.get("session_start", "")))
-    s_end = str(orig.get("Session end", orig.get("session_end", "")))
-    xp_raw = str(orig.get("XP Gain", orig.get("xp_gain", 0))).replace(",", "")
-    try:
-        xp = int(xp_raw)
-    except ValueError:
-        try:
-            xp = int(float(xp_raw))
-        except ValueError:
-            xp = 0
-    return (s_start, s_end, xp)
-
-
-def _row_key_from_norm_row(row: pd.Series) -> tuple[str, str, int]:
-    s_start = str(row.get("session_start", ""))
-    s_end = str(row.get("session_end", ""))
+def _row_keys_from_norm_df(df: pd.DataFrame) -> list[tuple[str, str, int]]:
+    """Claves (start, end, xp) de todas las filas a la vez (mismas reglas que fila a fila)."""
+    n = len(df)
+    if n == 0:
+        return []
+    starts = df["session_start"].astype(str).tolist() if "session_start" in df.columns else [""] * n
+    ends = df["session_end"].astype(str).tolist() if "session_end" in df.columns else [""] * n
+    if "xp_gain" in df.columns:
+        xps = pd.to_numeric(df["xp_gain"], errors="coerce").fillna(0).astype("int64").tolist()
+    else:
+        xps = [0] * n
+    return list(zip(starts, ends, xps))
+
+
+_OWNER_FIELDS = ("owner_user_id", "owner_id", "user_id", "uid", "uploaded_by", "created_by", "author_id")
+_KEY_FIELDS = ("Session start", "session_start", "Session end", "session_end", "XP Gain", "xp_gain")
+
+
+def _first_owner(it: dict) -> str:
+    # owner puede venir con distintas claves; si no hay, usamos "unknown"
+    for k in _OWNER_FIELDS:
+        v = it.get(k)
+        if v:
+            return str(v)
+    return "unknown"
+
+
+def _store_key_columns(rows: list[dict]) -> tuple[tuple, tuple, tuple]:
+    """
+    (starts, ends, xps crudos) del store. Los items salen del mismo exportador: los nombres
+    de clave se eligen con el primero y se leen con itemgetter, sin cadenas de .get().
+    Si alguna fila no los tiene (store mezclado), se vuelve a los .get() con fallback.
+    """
+    if not rows:
+        return (), (), ()
+    sample = rows[0]
+    getter = itemgetter(
+        "Session start" if "Session start" in sample else "session_start",
+        "Session end" if "Session end" in sample else "session_end",
+        "XP Gain" if "XP Gain" in sample else "xp_gain",
+    )
     try:
-        xp = int(row.get("xp_gain", 0))
-    except Exception:
-        xp = 0
-    return (s_start, s_end, xp)
-
-
-def _owner_map(store_rows: list[dict]) -> dict[tuple[str, str, int], str]:
-    m: dict[tuple[str, str, int], str] = {}
-    for it in store_rows:
-        key = _row_key_from_store_item(it)
-        # owner puede venir con distintas claves; si no hay, usamos "unknown"
-        owner = (
-            it.get("owner_user_id")
-            or it.get("owner_id")
-            or it.get("user_id")
-            or it.get("uid")
-            or it.get("uploaded_by")
-            or it.get("created_by")
-            or it.get("author_id")
-            or "unknown"
-        )
-        m[key] = str(owner)
-    return m
-
-
-@st.cache_data(show_spinner=False)
-def _safe_username(user_id: str) -> str:
+        keys = list(map(getter, rows))
+    except KeyError:
+        keys = [
+            (
+                it.get("Session start", it.get("session_start", "")),
+                it.get("Session end", it.get("session_end", "")),
+                it.get("XP Gain", it.get("xp_gain", 0)),
+            )
+            for it in rows
+        ]
+    starts, ends, xps = zip(*keys)
+    return starts, ends, xps
+
+
+@st.cache_data(show_spinner=False, max_entries=2)
+def _owner_map(store_sig: tuple[int, int]) -> dict[tuple[str, str, int], str]:
     """
-    Devuelve un nombre amigable a partir del user_id.
-    - Evita consultas para 'unknown' o cadenas vacías.
-    - Captura APIError (p. ej. 204 No Content) y hace fallback.
+    {(start, end, xp): owner} construido por columnas una vez por versión del store
+    (store_sig = mtime/tamaño de store.jsonl). Lee solo los campos de clave y owner.
+    """
+    store_rows = list(iter_store_fields(_KEY_FIELDS + _OWNER_FIELDS))
+    start_vals, end_vals, xp_vals = _store_key_columns(store_rows)
+    starts = list(map(str, start_vals))
+    ends = list(map(str, end_vals))
+    xp_raw = pd.Series([str(v).replace(",", "") for v in xp_vals], dtype=object)
+    xp_num = pd.to_numeric(xp_raw, errors="coerce").replace([np.inf, -np.inf], np.nan)
+    xps = xp_num.fillna(0).astype("int64").tolist()  # int(float(x)) trunca igual
+    owners = [_first_owner(it) for it in store_rows]
+    return dict(zip(zip(starts, ends, xps), owners))
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _owner_usernames_cached(owner_ids: tuple[str, ...]) -> dict[str, str]:
+    """{id: username} solo de los owners presentes en el store (lotes de .in_(), caché 5 min)."""
+    uids = [u for u in owner_ids if u and u.strip() and u.strip().lower() != "unknown"]
+    return get_usernames(uids)
+
+
+def _owner_usernames(owner_ids: tuple[str, ...]) -> dict[str, str]:
+    """
+    Igual que _owner_usernames_cached, pero si Supabase falla (APIError, p. ej. 204) → {}
+    y cada owner se muestra como uid[:8]. El fallo no se cachea: el siguiente rerun reintenta.
     """
-    uid = (user_id or "").strip()
-    if not uid or uid.lower() == "unknown":
-        return "unknown"
     try:
-        prof = get_profile(uid) or {}
+        return _owner_usernames_cached(owner_ids)
     except APIError:
-        # Supabase devolvió 204 u otro error → fallback
-        return uid[:8]
-    username = (prof.get("username") or "").strip()
-    return username if username else uid[:8]
+        return {}
+
+
+def _display_name(owner: str, names: dict[str, str]) -> str:
+    # 'unknown' / vacíos tal cual; sin perfil o sin username → uid[:8]
+    if not owner or owner.strip().lower() == "unknown":
+        return "unknown"
+    return (names.get(owner) or "").strip() or owner[:8]
 
 
 def _render() -> None:
     st.title("Admin")
     st.write("Solo admins pueden ver esto.")
 
-    store = load_store()
-    norm_df, pending_df = normalize_records(store)
-
-    owner_by_key = _owner_map(store)
+    _, norm_df, pending_df = load_normalized_store()
 
-    def map_owner(df: pd.DataFrame) -> pd.Series:
-        return df.apply(lambda r: owner_by_key.get(_row_key_from_norm_row(r), "unknown"), axis=1)
+    owner_by_key = _owner_map(store_signature())
 
-    norm_df = norm_df.copy()
-    pending_df = pending_df.copy()
-    norm_df["owner"] = map_owner(norm_df)
-    pending_df["owner"] = map_owner(pending_df)
+    def owner_counts(df: pd.DataFrame, label: str) -> pd.DataFrame:
+        # Cuenta por owner sin añadir columnas a los frames normalizados
+        if df.empty:
+            return pd.DataFrame({"owner": [], label: []})
+        owners = pd.Series([owner_by_key.get(k, "unknown") for k in _row_keys_from_norm_df(df)], dtype=object)
+        return owners.value_counts(sort=False).rename(label).rename_axis("owner").reset_index()
 
     # Conteos: Total (finalizados) y Pending (sin completar)
-    total_final = (
-        norm_df.groupby("owner").size().rename("Total hunts").reset_index()
-        if not norm_df.empty else pd.DataFrame({"owner": [], "Total hunts": []})
-    )
-    total_pending = (
-        pending_df.groupby("owner").size().rename("Pending").reset_index()
-        if not pending_df.empty else pd.DataFrame({"owner": [], "Pending": []})
-    )
+    total_final = owner_counts(norm_df, "Total hunts")
+    total_pending = owner_counts(pending_df, "Pending")
 
     counts = pd.merge(total_final, total_pending, on="owner", how="outer").fillna(0)
     if counts.empty:
@@ -114,8 +144,12 @@ def _render() -> None:
     counts["Total hunts"] = counts["Total hunts"].astype(int)
     counts["Pending"] = counts["Pending"].astype(int)
 
-    # Resolver nombres de usuario de forma segura y cacheada
-    counts["User"] = counts["owner"].map(_safe_username)
+    # Resolver nombres una vez por owner distinto (clave de caché ordenada)
+    owners = counts["owner"].astype(str)
+    owner_ids = sorted(owners.unique().tolist())
+    names = _owner_usernames(tuple(owner_ids))
+    name_map = {o: _display_name(o, names) for o in owner_ids}
+    counts["User"] = owners.map(name_map)
 
     counts = counts[["User", "owner", "Total hunts", "Pending"]].sort_values(
         ["Total hunts", "Pending", "User"], ascending=[False, False, True]
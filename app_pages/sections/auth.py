@@ -0,0 +1,128 @@
+# app_pages/sections/auth.py
+from __future__ import annotations
+import time
+import streamlit as st
+
+from ta_core.services.auth_service import signup, login
+from ta_core.auth_repo import get_profile, is_username_available, is_email_available
+from utils.ui_layout import form_cols
+from utils.validation import valid_username
+
+# Login/Sign up compartidos. Al vivir en un módulo importado (no en el script de la
+# página, que Streamlit re-ejecuta en cada rerun) las cachés tienen una única identidad.
+
+CHECK_DEBOUNCE_SEC = 0.3
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _cached_email_available(email: str) -> bool:
+    """Disponibilidad de email cacheada (clave = email normalizado)."""
+    return is_email_available(email)
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _cached_username_available(username: str) -> bool:
+    """Disponibilidad de username cacheada (clave = username normalizado)."""
+    return is_username_available(username)
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def get_profile_cached(uid: str) -> dict:
+    """Perfil (username/email/role) cacheado por uid; cambia muy poco."""
+    return get_profile(uid) or {}
+
+
+def _debounced(ts_key: str) -> bool:
+    """True si el submit llega antes de CHECK_DEBOUNCE_SEC desde el anterior (se ignora)."""
+    now = time.monotonic()
+    last = st.session_state.get(ts_key)
+    st.session_state[ts_key] = now
+    return last is not None and (now - last) < CHECK_DEBOUNCE_SEC
+
+
+def render_login() -> None:
+    col_form, _ = form_cols("sm")
+    with col_form:
+        with st.form("login_form", clear_on_submit=False):
+            email = st.text_input("Email", key="login_email").strip().lower()
+            password = st.text_input("Password", type="password", key="login_pwd")
+            submitted = st.form_submit_button("Login")
+
+        if submitted:
+            ok, msg = login(email, password)
+            text = msg if isinstance(msg, str) else str(msg)
+            if ok:
+                st.session_state["account_view"] = "profile"
+                # Rerun completo (no de fragment): la navegación de streamlit_app.py depende del login
+                st.rerun()
+            else:
+                st.error(text)
+
+
+def render_signup() -> None:
+    st.caption("**Username** will be publicly visible.")
+
+    # Un único form: los inputs no provocan reruns hasta pulsar "Create account"
+    col_form, _ = form_cols("md")
+    with col_form:
+        with st.form("signup_form", clear_on_submit=False):
+            su_email = st.text_input("Email", value="", placeholder="you@example.com", key="su_email")
+            su_username = st.text_input("Username", value="", placeholder="your_nick", key="su_username")
+            su_pass1 = st.text_input("Password", type="password", key="su_pass1")
+            su_pass2 = st.text_input("Confirm password", type="password", key="su_pass2")
+            submitted = st.form_submit_button("Create account")
+
+    if not submitted or _debounced("_last_signup_ts"):
+        return
+
+    email = (su_email or "").strip().lower()
+    username = (su_username or "").strip()
+    if not email or not username or not su_pass1 or not su_pass2:
+        st.error("Please fill all fields.")
+        return
+    if su_pass1 != su_pass2:
+        st.error("Passwords do not match.")
+        return
+    if not valid_username(username):
+        st.error("Username must be 3–10 chars, letters/numbers/underscore only.")
+        return
+    # En el hilo del script: las cachés de Streamlit (y get_supabase) necesitan su ScriptRunContext
+    if not _cached_email_available(email):
+        st.error("Email already used")
+        return
+    if not _cached_username_available(username):
+        st.error("Username taken")
+        return
+
+    ok, msg = signup(email, su_pass1, username)
+    text = msg if isinstance(msg, str) else str(msg)
+    if ok:
+        st.success("Account created. Please check your email if confirmation is required.")
+    else:
+        st.error(text)
+
+
+@st.fragment
+def render() -> None:
+    """Selector Login / Sign up para usuarios sin sesión; cambiar de modo o enviar un form solo re-ejecuta este fragment."""
+    DEFAULT = "Login"
+    options = ["Login", "Sign up"]
+    current = st.session_state.get("account_mode", DEFAULT)
+    try:
+        start_index = options.index(current)
+    except ValueError:
+        start_index = 0
+
+    choice = st.radio(
+        label="Account mode",
+        options=options,
+        index=start_index,
+        horizontal=True,
+        label_visibility="collapsed",
+        key="account_mode",
+    )
+
+    if choice == "Login":
+        render_login()
+    else:
+        render_signup()
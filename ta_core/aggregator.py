@@ -1,6 +1,9 @@
 # ta_core/aggregator.py
 from __future__ import annotations
 from typing import Dict, Any, Iterable, List
+import re
+
+import numpy as np
 import pandas as pd
 
 
@@ -19,21 +22,6 @@ _CANDIDATE_KILLS_COLUMNS: tuple[str, ] = (
     "monsters",
 )
 
-def _get_any(row: Any, keys: Iterable[str], default=None):
-    """Obtiene el primer valor existente en 'row' para cualquiera de las claves."""
-    get = row.get if hasattr(row, "get") else (lambda k, d=None: getattr(row, k, d))
-    for k in keys:
-        if hasattr(row, "index"):
-            # pandas Series
-            if k in row.index:
-                return get(k, default)
-        else:
-            v = get(k, default)
-            if v is not None:
-                return v
-    return default
-
-
 def _parse_as_mapping(val: Any) -> Dict[str, float]:
     """Convierte distintos formatos a {monster: kills_float}."""
     if val is None:
@@ -101,114 +89,97 @@ def _parse_as_mapping(val: Any) -> Dict[str, float]:
     return {}
 
 
-def _extract_kills_mapping_from_row(row: Any) -> Dict[str, float]:
-    """Busca kills en distintas columnas y las normaliza a {monster: kills}.
+def _kills_mappings(df: pd.DataFrame) -> List[Dict[str, float]]:
+    """{monster: kills} por fila, columna a columna.
 
-    Soporta explícitamente el formato real de tus sesiones:
-    - "Killed Monsters": lista de dicts con {"Name": str, "Count": num}
+    Primero "Killed Monsters" (formato real: lista de dicts Name/Count) y luego las
+    columnas candidatas; en cada fila gana la primera que dé un mapping no vacío.
     """
-    get = row.get if hasattr(row, "get") else (lambda k, d=None: getattr(row, k, d))
-
-    # 1) Formato real: "Killed Monsters" (lista de dicts Name/Count)
-    for key in ("Killed Monsters", "killed_monsters", "Killed monsters"):
-        if hasattr(row, "index"):
-            present = key in row.index
-        else:
-            present = getattr(row, key, None) is not None
-        if present:
-            val = get(key, None)
-            mapping = _parse_as_mapping(val)
-            if mapping:
-                return mapping
-
-    # 2) Otras columnas candidatas (dict/JSON/lista de pares)
-    for col in _CANDIDATE_KILLS_COLUMNS:
-        if hasattr(row, "index") and col not in row.index:
+    out: List[Dict[str, float]] = [{} for _ in range(len(df))]
+    for col in ("Killed Monsters", "killed_monsters", "Killed monsters", *_CANDIDATE_KILLS_COLUMNS):
+        if col not in df.columns:
             continue
-        val = get(col, None)
-        mapping = _parse_as_mapping(val)
-        if mapping:
-            return mapping
+        for i, val in enumerate(df[col].tolist()):
+            if not out[i]:
+                out[i] = _parse_as_mapping(val)
+    return out
 
-    return {}
+
+# 'Session length': '00:22h' / '1:02h' (hh:mm), '1h 2min', '2h', '62min'
+_RX_SESSION_LENGTH = re.compile(
+    r"^\s*(?:(?P<hh>\d+):(?P<mm>\d+)\s*h|(?:(?P<h>\d+)\s*h)?\s*(?:(?P<m>\d+)\s*min)?)\s*$",
+    re.IGNORECASE,
+)
 
 
-def _parse_session_length(text: str) -> float:
-    """Intenta parsear 'Session length' como horas.
-    Admite formatos tipo '00:22h', '1:02h', '1h 2min', '62min'.
-    """
-    if not text:
-        return 0.0
-    s = str(text).strip().lower()
-    try:
-        # 'HH:MMh' → split ':'
-        if ":" in s and "h" in s:
-            hh, mmh = s.split(":", 1)
-            mm = "".join(ch for ch in mmh if ch.isdigit()) or "0"
-            return max(0.0, float(int(hh)) + float(int(mm)) / 60.0)
-        # '1h 2min'
-        if "h" in s:
-            parts = s.replace("min", "").split("h")
-            H = int(parts[0].strip() or "0")
-            M = int(parts[1].strip() or "0") if len(parts) > 1 else 0
-            return max(0.0, H + M / 60.0)
-        # '62min'
-        if "min" in s:
-            m = int(s.replace("min", "").strip() or "0")
-            return max(0.0, m / 60.0)
-    except Exception:
-        return 0.0
-    return 0.0
-
-
-def _row_hours_fallback(row) -> float:
-    """Devuelve horas de una fila, usando esta prioridad:
+def _parse_session_length_vec(s: pd.Series) -> np.ndarray:
+    """Parsea una columna 'Session length' a horas de una vez (0.0 si no encaja)."""
+    parts = s.astype("string").str.extract(_RX_SESSION_LENGTH).astype(float)
+    hours = np.where(
+        parts["hh"].notna(),
+        parts["hh"] + parts["mm"] / 60.0,
+        parts["h"].fillna(0.0) + parts["m"].fillna(0.0) / 60.0,
+    )
+    return np.nan_to_num(hours, nan=0.0)
+
+
+def _first_column(df: pd.DataFrame, keys: Iterable[str]):
+    """Primera columna presente de 'keys' (o None)."""
+    for k in keys:
+        if k in df.columns:
+            return df[k]
+    return None
+
+
+def _hours_series(df: pd.DataFrame) -> pd.Series:
+    """Horas de cada fila por columnas, usando esta prioridad:
        1) duration_sec
        2) __hours
        3) session_start / session_end (o variantes con mayúsculas)
        4) Session length (string)
+    Cada paso solo rellena las filas que siguen sin horas (> 0); el resto queda en 0.0.
     """
-    get = row.get if hasattr(row, "get") else (lambda k, d=None: getattr(row, k, d))
+    hours = np.full(len(df), np.nan)
+
+    def _fill(values: np.ndarray, rows: np.ndarray) -> None:
+        ok = values > 0
+        hours[rows[ok]] = values[ok]
+
+    def _missing() -> np.ndarray:
+        return np.flatnonzero(np.isnan(hours))
 
     # 1) duration_sec
     for key in ("duration_sec", "Duration Sec", "duration"):
-        try:
-            ds = get(key, None)
-            if ds is not None and float(ds) > 0:
-                return float(ds) / 3600.0
-        except Exception:
-            pass
+        if key in df.columns:
+            rows = _missing()
+            sec = pd.to_numeric(df[key].iloc[rows], errors="coerce").to_numpy(dtype=float)
+            _fill(sec / 3600.0, rows)
 
     # 2) __hours
-    try:
-        hh = get("__hours", None)
-        if hh is not None and float(hh) > 0:
-            return float(hh)
-    except Exception:
-        pass
-
-    # 3) session_start / session_end (snake y TibiLog original)
-    start = _get_any(row, ("session_start", "Session start"), None)
-    end = _get_any(row, ("session_end", "Session end"), None)
-    try:
-        if start is not None and end is not None:
-            s = pd.to_datetime(start, errors="coerce")
-            e = pd.to_datetime(end, errors="coerce")
-            if pd.notna(s) and pd.notna(e):
-                sec = (e - s).total_seconds()
-                if sec and sec > 0:
-                    return sec / 3600.0
-    except Exception:
-        pass
+    if "__hours" in df.columns:
+        rows = _missing()
+        _fill(pd.to_numeric(df["__hours"].iloc[rows], errors="coerce").to_numpy(dtype=float), rows)
+
+    # 3) session_start / session_end (snake y TibiLog original): un to_datetime por columna
+    start = _first_column(df, ("session_start", "Session start"))
+    end = _first_column(df, ("session_end", "Session end"))
+    rows = _missing()
+    if start is not None and end is not None and rows.size:
+        try:
+            s = pd.to_datetime(start.iloc[rows], errors="coerce", format="mixed")
+            e = pd.to_datetime(end.iloc[rows], errors="coerce", format="mixed")
+            _fill((e - s).dt.total_seconds().to_numpy(dtype=float) / 3600.0, rows)
+        except (TypeError, ValueError):
+            # p.ej. zonas horarias mezcladas: se pasa al paso 4
+            pass
 
     # 4) Session length (string)
-    length_txt = _get_any(row, ("Session length", "session_length"), None)
-    if isinstance(length_txt, str):
-        hrs = _parse_session_length(length_txt)
-        if hrs > 0:
-            return hrs
+    length = _first_column(df, ("Session length", "session_length"))
+    rows = _missing()
+    if length is not None and rows.size:
+        _fill(_parse_session_length_vec(length.iloc[rows]), rows)
 
-    return 0.0
+    return pd.Series(np.nan_to_num(hours, nan=0.0), index=df.index)
 
 
 # ============================================================================
@@ -231,7 +202,8 @@ def aggregate_by_zone(df: pd.DataFrame) -> pd.DataFrame:
     else:
         df["hours"] = 0.0
 
-    grp = df.groupby("zona", as_index=False).agg(
+    # sort=False: el resultado se ordena por Balance/h justo después
+    grp = df.groupby("zona", as_index=False, sort=False, observed=True).agg(
         hunts=("path", "count"),
         hours_total=("hours", "sum"),
         xp_gain_total=("xp_gain", "sum"),
@@ -241,17 +213,19 @@ def aggregate_by_zone(df: pd.DataFrame) -> pd.DataFrame:
         balance_total=("balance", "sum"),
     )
 
-    def _safe_div(num, den):
-        try:
-            return (float(num) / float(den)) if float(den) > 0 else 0.0
-        except Exception:
-            return 0.0
-
-    grp["xp_gain_per_h"] = grp.apply(lambda r: _safe_div(r["xp_gain_total"], r["hours_total"]), axis=1)
-    grp["raw_xp_gain_per_h"] = grp.apply(lambda r: _safe_div(r["raw_xp_gain_total"], r["hours_total"]), axis=1)
-    grp["supplies_per_h"] = grp.apply(lambda r: _safe_div(r["supplies_total"], r["hours_total"]), axis=1)
-    grp["loot_per_h"] = grp.apply(lambda r: _safe_div(r["loot_total"], r["hours_total"]), axis=1)
-    grp["balance_per_h"] = grp.apply(lambda r: _safe_div(r["balance_total"], r["hours_total"]), axis=1)
+    # Tasas por hora vectorizadas: 0.0 donde no hay horas (o son NaN)
+    hours = grp["hours_total"].to_numpy(dtype=float)
+    has_hours = hours > 0
+    safe_hours = np.where(has_hours, hours, 1.0)
+    for total, per_h in (
+        ("xp_gain_total", "xp_gain_per_h"),
+        ("raw_xp_gain_total", "raw_xp_gain_per_h"),
+        ("supplies_total", "supplies_per_h"),
+        ("loot_total", "loot_per_h"),
+        ("balance_total", "balance_per_h"),
+    ):
+        num = pd.to_numeric(grp[total], errors="coerce").to_numpy(dtype=float)
+        grp[per_h] = np.where(has_hours, num / safe_hours, 0.0)
 
     out = grp[[
         "zona", "hunts", "hours_total", "xp_gain_per_h", "raw_xp_gain_per_h",
@@ -282,30 +256,19 @@ def compute_monsters_kph_for_df(df: pd.DataFrame) -> Dict[str, float]:
     if df is None or df.empty:
         return {}
 
-    kills_sum: Dict[str, float] = {}
-    hours_sum: Dict[str, float] = {}
-
-    for _, row in df.iterrows():
-        hours = _row_hours_fallback(row)
-        if hours <= 0:
-            continue
-
-        km = _extract_kills_mapping_from_row(row)
-        if not km:
-            continue
+    hours = _hours_series(df).to_numpy()
+    mappings = _kills_mappings(df)
 
-        for monster, k in km.items():
-            try:
-                kf = float(k or 0)
-            except Exception:
-                continue
-            if kf <= 0:
-                continue
-            kills_sum[monster] = kills_sum.get(monster, 0.0) + kf
-            hours_sum[monster] = hours_sum.get(monster, 0.0) + hours
+    # Una fila por (sesión, monstruo) con explode y un único groupby por nombre
+    km = pd.DataFrame({"__hours": hours, "kills": [list(m.items()) for m in mappings]})
+    km = km.loc[km["__hours"] > 0].explode("kills", ignore_index=True).dropna(subset=["kills"])
+    if km.empty:
+        return {}
+    km["Name"] = [name for name, _ in km["kills"]]
+    km["Count"] = pd.to_numeric([k for _, k in km["kills"]], errors="coerce")
+    km = km.loc[km["Count"] > 0]
+    if km.empty:
+        return {}
 
-    out: Dict[str, float] = {}
-    for m, ksum in kills_sum.items():
-        hrs = hours_sum.get(m, 0.0)
-        out[m] = round(ksum / hrs, 4) if hrs > 0 else 0.0
-    return out
+    g = km.groupby("Name", sort=False).agg(k=("Count", "sum"), h=("__hours", "sum"))
+    return (g["k"] / g["h"]).round(4).to_dict()
@@ -1,5 +1,5 @@
 from __future__ import annotations
-from typing import Optional, Literal, Dict
+from typing import Optional, Literal, Dict, List
 from supabase import Client
 from ta_core.services.auth_service import get_supabase
 
@@ -37,6 +37,29 @@ def get_profile(user_id: Optional[str]) -> Optional[Dict]:
     return getattr(res, "data", None) or None
 
 
+# Ids por consulta .in_(): mantiene la URL corta y cada lote bajo el límite de filas de PostgREST
+_USERNAMES_BATCH = 200
+
+
+def get_usernames(user_ids: List[str]) -> Dict[str, str]:
+    """{id: username} de varios perfiles, en lotes de .in_() (ids sin perfil no aparecen)."""
+    ids = [u for u in dict.fromkeys(user_ids) if u]
+    if not ids:
+        return {}
+    sb: Client = get_supabase()
+    out: Dict[str, str] = {}
+    for i in range(0, len(ids), _USERNAMES_BATCH):
+        res = (
+            sb.table("profiles")
+            .select("id,username")
+            .in_("id", ids[i:i + _USERNAMES_BATCH])
+            .execute()
+        )
+        rows = getattr(res, "data", None) or []
+        out.update({str(r.get("id")): (r.get("username") or "") for r in rows if r.get("id")})
+    return out
+
+
 # --- Disponibilidad usando RPCs seguras ---
 
 def _email_exists(email: str) -> bool:
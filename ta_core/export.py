@@ -1,4 +1,9 @@
+import io
+
 import pandas as pd
 
 def df_to_csv_bytes(df: pd.DataFrame) -> bytes:
-    return df.to_csv(index=False).encode("utf-8")
\ No newline at end of file
+    # Directo a un buffer binario: sin el str intermedio + encode; "\n" fijo en cualquier SO
+    buf = io.BytesIO()
+    df.to_csv(buf, index=False, encoding="utf-8", lineterminator="\n", chunksize=10_000)
+    return buf.getvalue()
@@ -0,0 +1,21 @@
+# ta_core/levels.py
+from __future__ import annotations
+from functools import lru_cache
+from typing import Tuple
+
+# Tramos fijos bajos; a partir de 101 se generan por rangos (50 niveles hasta 1000, 100 después)
+_LOW_BUCKETS = ("8-25", "26-50", "51-75", "76-100")
+
+
+@lru_cache(maxsize=1)
+def make_level_buckets() -> Tuple[str, ...]:
+    """Rangos de nivel de los hunts: 8-100 en tramos de 25, luego 50 y desde 1001 de 100."""
+    return (
+        *_LOW_BUCKETS,
+        *(f"{s}-{s + 49}" for s in range(101, 952, 50)),
+        *(f"{s}-{s + 99}" for s in range(1001, 1902, 100)),
+    )
+
+
+# Calculado una vez al importar (las páginas se re-ejecutan en cada rerun, este módulo no)
+LEVEL_BUCKETS: Tuple[str, ...] = make_level_buckets()
@@ -1,5 +1,5 @@
 import re
-from typing import Dict, List, Tuple, Any
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 import pandas as pd
 from dateutil import parser as dt
@@ -7,6 +7,9 @@ from dateutil import parser as dt
 NUM_COMMAS = re.compile(r"[,.]")
 DUR_HMH = re.compile(r"^(\d{1,2}):(\d{2})h$", re.IGNORECASE)
 
+# Columnas de baja cardinalidad que filtran/agrupan las páginas: category (códigos enteros)
+CATEGORY_COLS = ("vocation", "mode", "level_bucket", "zona")
+
 REQ_FIELDS = [
     "path","session_start","session_end","duration","xp_gain","raw_xp_gain",
     "supplies","loot","vocation","mode","zona","level"
@@ -123,6 +126,17 @@ def _extract_kills_from_raw(rec: Dict[str, Any]) -> Dict[str, float]:
         return _km_list_to_mapping(rec.get("kills_by_monster"))
     return {}
 
+def record_key(rec: Dict[str, Any]) -> Tuple[str, str, int]:
+    """
+    Clave (session_start, session_end, xp_gain) de un hunt crudo del store, con los mismos
+    alias y el mismo _to_int que normalize_records: coincide con la de sus filas normalizadas.
+    """
+    return (
+        str(_get(rec, "session_start") or ""),
+        str(_get(rec, "session_end") or ""),
+        _to_int(_get(rec, "xp_gain")),
+    )
+
 # ---------- normalizador ----------
 def normalize_records(raw_records: List[Dict]) -> Tuple[pd.DataFrame, pd.DataFrame]:
     rows: List[Dict[str, Any]] = []
@@ -227,6 +241,8 @@ def normalize_records(raw_records: List[Dict]) -> Tuple[pd.DataFrame, pd.DataFra
         # ---- NUEVO: crea kills_by_monster desde el raw ----
         if "kills_by_monster" not in df.columns or df["kills_by_monster"].isna().all():
             df["kills_by_monster"] = df.get("source_raw", pd.Series([{}]*len(df))).apply(_extract_kills_from_raw)
+        for col in CATEGORY_COLS:
+            df[col] = df[col].astype("category")
 
     if not pending_df.empty:
         for col in ["xp_gain","raw_xp_gain","supplies","loot","balance","duration_sec","level_min","level_max"]:
@@ -238,3 +254,33 @@ def normalize_records(raw_records: List[Dict]) -> Tuple[pd.DataFrame, pd.DataFra
             pending_df["kills_by_monster"] = pending_df.get("source_raw", pd.Series([{}]*len(pending_df))).apply(_extract_kills_from_raw)
 
     return df, pending_df
+
+
+def normalize_records_append(
+    norm_df: pd.DataFrame,
+    pending_df: pd.DataFrame,
+    new_records: List[Dict],
+    derive: Optional[Callable[[pd.DataFrame], pd.DataFrame]] = None,
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Igual que normalize_records(old + new) pero normalizando solo `new_records`:
+    cada registro se normaliza por separado, así que basta con concatenar el delta.
+    `derive` añade al delta procesado las columnas derivadas que ya tenga norm_df.
+    """
+    add_df, add_pending = normalize_records(new_records)
+    if derive is not None and not add_df.empty:
+        add_df = derive(add_df)
+
+    def _concat(base: pd.DataFrame, extra: pd.DataFrame) -> pd.DataFrame:
+        if extra.empty:
+            return base
+        if base.empty:
+            return extra
+        out = pd.concat([base, extra], ignore_index=True)
+        # concat de categorías distintas devuelve object: se vuelve a category
+        for col in CATEGORY_COLS:
+            if col in out.columns and isinstance(base[col].dtype, pd.CategoricalDtype):
+                out[col] = out[col].astype("category")
+        return out
+
+    return _concat(norm_df, add_df), _concat(pending_df, add_pending)
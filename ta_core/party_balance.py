@@ -0,0 +1,72 @@
+# ta_core/party_balance.py
+from __future__ import annotations
+import re
+
+TRANSFER_POS_PAT = re.compile(r"(received|get|from|credit|deposit)", re.I)
+TRANSFER_NEG_PAT = re.compile(r"(paid|sent|to|debit|withdraw)", re.I)
+NUMBER_PAT = re.compile(r"[-+]?\d{1,3}(?:[.,]\d{3})*(?:[.,]\d+)?|[-+]?\d+")
+
+# Compilados una vez: 'Balance:' por línea (con su sangría) y palabra de transferencia
+# positiva/negativa en un único patrón (la primera coincidencia decide el signo).
+BALANCE_LINE_PAT = re.compile(
+    r"^([^\S\n]*)[^\n]*?Balance[^\S\n]*:[^\S\n]*([-+]?\d{1,3}(?:[.,]\d{3})*(?:[.,]\d+)?|[-+]?\d+)",
+    re.I | re.M,
+)
+TRANSFER_WORD_PAT = re.compile(
+    rf"(?P<pos>{TRANSFER_POS_PAT.pattern})|(?P<neg>{TRANSFER_NEG_PAT.pattern})", re.I
+)
+# Transferencias en una sola pasada: fin de línea (los mismos que str.splitlines), palabra
+# positiva/negativa o número. Letras, dígitos y saltos no se solapan entre sí.
+TRANSFER_TOKEN_PAT = re.compile(
+    r"(?P<nl>[\n\r\x0b\x0c\x1c-\x1e\x85\u2028\u2029])|"
+    rf"{TRANSFER_WORD_PAT.pattern}|(?P<num>{NUMBER_PAT.pattern})",
+    re.I,
+)
+_DROP_SEPARATORS = str.maketrans("", "", ".,")
+
+
+def parse_real_balance(text: str) -> int:
+    """Balance real por jugador de un texto pegado de Party Hunt o de transferencias."""
+    def to_int(s: str) -> int:
+        s = s.translate(_DROP_SEPARATORS)
+        try:
+            return int(s)
+        except Exception:
+            return 0
+
+    # 1) Party Hunt con 'Balance:' total + balances por jugador (una pasada sobre todo el texto)
+    # Saltos de línea normalizados a "\n" (mismos cortes que str.splitlines: \r\n, \r,
+    # \x0b, \u2028...): '^' bajo re.M solo reconoce "\n"
+    lines_text = "\n".join(text.splitlines())
+    session_total = None
+    member_count = 0
+    for m in BALANCE_LINE_PAT.finditer(lines_text):
+        val = to_int(m.group(2))
+        if not m.group(1) and session_total is None:
+            session_total = val
+        else:
+            member_count += 1
+
+    if session_total is not None:
+        divisor = member_count if member_count > 0 else 1
+        return int(round(session_total / divisor))
+
+    # 2) Transferencias. Si en la línea hay palabras positivas y negativas,
+    # manda la que aparece primero (heurística simple); si solo hay de un tipo, esa.
+    total = 0
+    sign = 0      # signo de la primera palabra de la línea (0 = aún ninguna)
+    amount = None  # primer número de la línea
+    for tok in TRANSFER_TOKEN_PAT.finditer(text):
+        kind = tok.lastgroup
+        if kind == "nl":
+            if sign and amount is not None:
+                total += sign * amount
+            sign, amount = 0, None
+        elif kind == "num":
+            if amount is None:
+                amount = to_int(tok.group())
+        elif not sign:
+            sign = 1 if kind == "pos" else -1
+    if sign and amount is not None:
+        total += sign * amount
+    return total
@@ -2,7 +2,7 @@
 import json
 import os
 import hashlib
-from typing import List, Dict, Tuple
+from typing import Iterable, Iterator, List, Dict, Optional, Tuple
 
 # -----------------------
 # Rutas de datos
@@ -39,6 +39,26 @@ def load_store() -> List[Dict]:
     return rows
 
 
+def iter_store_fields(fields: Iterable[str]) -> Iterator[Dict]:
+    """
+    Recorre el store línea a línea devolviendo solo `fields` de cada registro.
+    Para lecturas parciales (owners, conteos): no retiene los registros completos.
+    """
+    ensure_data_dirs()
+    keep = frozenset(fields)
+    with open(STORE_JSONL, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                rec = json.loads(line)
+            except Exception:
+                continue
+            if isinstance(rec, dict):
+                yield {k: v for k, v in rec.items() if k in keep}
+
+
 def save_store(rows: List[Dict]) -> None:
     ensure_data_dirs()
     with open(STORE_JSONL, "w", encoding="utf-8") as f:
@@ -72,11 +92,16 @@ def clear_hashes() -> None:
 # -----------------------
 # Subida de ficheros con desduplicado por hash
 # -----------------------
-def add_uploaded_files(files) -> Tuple[int, int]:
+# Campos que ya indican dueño en un hunt subido (si ninguno trae valor, se sella owner_id)
+OWNER_FIELDS = ("owner_id", "user_id", "uid", "uploaded_by", "created_by", "author_id")
+
+
+def add_uploaded_files(files, owner_id: Optional[str] = None) -> Tuple[int, int, List[Dict]]:
     """
     Añade JSONs al store aplicando dedupe por hash SHA-256.
     - `files` es la lista de UploadedFile de Streamlit.
-    - Devuelve (ok_count, fail_count).
+    - `owner_id`: si se da, se sella en los hunts nuevos que no traen dueño.
+    - Devuelve (ok_count, fail_count, new_items) con referencias a los hunts añadidos.
     """
     ensure_data_dirs()
     rows = load_store()
@@ -84,8 +109,7 @@ def add_uploaded_files(files) -> Tuple[int, int]:
 
     ok = 0
     fail = 0
-    # Caminos (hashes) nuevos detectados en esta subida (para sellar owner después si procede)
-    new_hashes_this_batch: List[str] = []
+    new_items: List[Dict] = []
 
     for f in files:
         try:
@@ -94,41 +118,38 @@ def add_uploaded_files(files) -> Tuple[int, int]:
             if sha in hashes:
                 # Duplicado → lo saltamos
                 continue
-            # Parse JSON (puede ser objeto o lista de objetos)
-            obj = json.loads(data.decode("utf-8"))
+            # Parse JSON (puede ser objeto o lista de objetos). json.loads acepta bytes:
+            # detecta la codificación (incl. BOM) sin una copia intermedia a str.
+            obj = json.loads(data)
             if isinstance(obj, dict):
-                item = obj
-                # Asegurar flags mínimos
-                if "has_all_meta" not in item:
-                    item["has_all_meta"] = False
-                # NUEVO: owner vacío por defecto (se rellenará en la capa superior)
-                item.setdefault("owner_user_id", None)
-                rows.append(item)
-                ok += 1
+                items = [obj]
             elif isinstance(obj, list):
-                for item in obj:
-                    if not isinstance(item, dict):
-                        continue
-                    if "has_all_meta" not in item:
-                        item["has_all_meta"] = False
-                    item.setdefault("owner_user_id", None)  # NUEVO
-                    rows.append(item)
-                    ok += 1
+                items = [it for it in obj if isinstance(it, dict)]
             else:
                 fail += 1
                 continue
 
+            for item in items:
+                # Asegurar flags mínimos
+                if "has_all_meta" not in item:
+                    item["has_all_meta"] = False
+                item.setdefault("owner_user_id", None)
+                if owner_id and not any(str(item.get(k, "")).strip() for k in OWNER_FIELDS):
+                    item["owner_id"] = owner_id
+                new_items.append(item)
+            ok += len(items)
+
             hashes.add(sha)
-            new_hashes_this_batch.append(sha)
         except Exception:
             fail += 1
 
-    save_store(rows)
-    save_hashes(list(hashes))
+    # Una sola escritura, y solo si hay algo nuevo
+    if new_items:
+        rows.extend(new_items)
+        save_store(rows)
+        save_hashes(list(hashes))
 
-    # Devolvemos (ok, fail). El sellado efectivo del owner lo hará la página Upload
-    # tras conocer el usuario actual. Aquí solo garantizamos el campo presente (None).
-    return ok, fail
+    return ok, fail, new_items
 
 
 def dedupe_info() -> Dict:
@@ -176,9 +197,8 @@ def get_user_counts() -> Dict[str, Dict[str, int]]:
     - 'pending' cuenta hunts con has_all_meta=False.
     - Si un registro no tiene owner_user_id, se agrupa en 'unknown'.
     """
-    rows = load_store()
     by_user: Dict[str, Dict[str, int]] = {}
-    for rec in rows:
+    for rec in iter_store_fields(("owner_user_id", "has_all_meta")):
         uid = rec.get("owner_user_id") or "unknown"
         d = by_user.setdefault(uid, {"total": 0, "pending": 0})
         if rec.get("has_all_meta", False):
@@ -15,6 +15,8 @@ from utils.debug_console import dbg, debug_enabled
 def _supabase_client() -> Client:
     """
     Instancia única de cliente Supabase usando secrets/env.
+    Se comparte entre reruns: postgrest/gotrue reutilizan su sesión httpx
+    (keep-alive), así que cada consulta no repite el handshake TCP/TLS.
     """
     url = os.environ.get("SUPABASE_URL") or st.secrets.get("SUPABASE_URL", "")
     key = os.environ.get("SUPABASE_ANON_KEY") or st.secrets.get("SUPABASE_ANON_KEY", "")
@@ -62,6 +62,17 @@ def _is_zip(payload: bytes) -> bool:
 # ---------------------------------------------------------------------
 # Export
 # ---------------------------------------------------------------------
+def backup_signature() -> Tuple[Optional[Tuple[int, int]], ...]:
+    """(mtime_ns, tamaño) de cada fichero del backup (None si no existe): cambia si cambia el zip."""
+    sig = []
+    for path in _FILES.values():
+        try:
+            info = os.stat(path)
+            sig.append((info.st_mtime_ns, info.st_size))
+        except FileNotFoundError:
+            sig.append(None)
+    return tuple(sig)
+
 def export_backup_bytes() -> Tuple[bytes, str]:
     """
     Export all persistent app data in a single zip:
@@ -0,0 +1,39 @@
+import unittest
+
+from ta_core.party_balance import parse_real_balance
+
+PARTY_LINES = [
+    "Session data: From 2024-01-01, 10:00:00 to 2024-01-01, 11:00:00",
+    "Balance: 10,000",
+    "  Knight (Leader)",
+    "    Balance: 3,000",
+    "  Druid",
+    "    Balance: 7,000",
+]
+TRANSFER_LINES = [
+    "received 1,500 gold from Alice",
+    "paid 300 to Bob",
+    "sent 200 to Carol",
+]
+
+
+class ParseRealBalanceLineEndingsTest(unittest.TestCase):
+    """Salida fijada del parser por líneas original (str.splitlines) para cada fin de línea."""
+
+    def test_party_hunt_any_line_ending(self):
+        for sep in ("\n", "\r\n", "\r", "\u2028"):
+            with self.subTest(sep=repr(sep)):
+                self.assertEqual(parse_real_balance(sep.join(PARTY_LINES) + sep), 5000)
+
+    def test_transfers_any_line_ending(self):
+        for sep in ("\n", "\r\n", "\r"):
+            with self.subTest(sep=repr(sep)):
+                self.assertEqual(parse_real_balance(sep.join(TRANSFER_LINES)), 1000)
+
+    def test_balance_number_not_taken_from_next_line(self):
+        self.assertEqual(parse_real_balance("Balance:\r\n5000\r\n  Balance: 1\r\n"), 0)
+        self.assertEqual(parse_real_balance("Balance:\r5000\r  Balance: 1\r"), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
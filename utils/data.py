@@ -1,12 +1,63 @@
 # utils/data.py
 from __future__ import annotations
-from typing import List, Tuple
+import os
+from typing import Dict, List, Optional, Tuple
 import pandas as pd
 import streamlit as st
 
 # Integra con tu core real
-from ta_core.repository import load_store, add_uploaded_files
-from ta_core.normalizer import normalize_records
+from ta_core.repository import STORE_JSONL, ensure_data_dirs, load_store, add_uploaded_files
+from ta_core.normalizer import normalize_records, normalize_records_append
+
+
+# ---------- Store normalizado (cacheado) ----------
+def store_signature() -> Tuple[int, int]:
+    """(mtime_ns, tamaño) del store: cambia con cada save_store()."""
+    ensure_data_dirs()
+    info = os.stat(STORE_JSONL)
+    return info.st_mtime_ns, info.st_size
+
+
+def _add_derived_columns(norm_df: pd.DataFrame) -> pd.DataFrame:
+    # Fechas parseadas una sola vez por versión del store (las páginas solo las leen)
+    for col in ("session_start", "session_end"):
+        if col in norm_df.columns:
+            norm_df[f"{col}_dt"] = pd.to_datetime(norm_df[col], errors="coerce", format="mixed")
+    # __hours desde esas fechas: el fallback de horas del aggregator lo usa antes de
+    # volver a parsear start/end fila a fila (NaN si falta alguna fecha).
+    if {"session_start_dt", "session_end_dt"} <= set(norm_df.columns) and "__hours" not in norm_df.columns:
+        norm_df["__hours"] = (norm_df["session_end_dt"] - norm_df["session_start_dt"]).dt.total_seconds() / 3600.0
+    return norm_df
+
+
+@st.cache_resource
+def _prebuilt() -> Dict[Tuple[int, int], Tuple[List[Dict], pd.DataFrame, pd.DataFrame]]:
+    """Resultado ya normalizado tras una subida, {firma del store: (store, norm_df, pending_df)}."""
+    return {}
+
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _cached_normalized(mtime_ns: int, size: int) -> Tuple[List[Dict], pd.DataFrame, pd.DataFrame]:
+    pre = _prebuilt().pop((mtime_ns, size), None)
+    if pre is not None:
+        return pre
+    store = load_store()
+    norm_df, pending_df = normalize_records(store)
+    return store, _add_derived_columns(norm_df), pending_df
+
+
+def load_normalized_store() -> Tuple[List[Dict], pd.DataFrame, pd.DataFrame]:
+    """
+    Devuelve (store, norm_df, pending_df) sin re-leer ni re-normalizar el JSONL
+    mientras el fichero no cambie. st.cache_data entrega copias: se pueden mutar.
+    """
+    return _cached_normalized(*store_signature())
+
+
+def invalidate_store_cache() -> None:
+    """Llamar tras save_store() (por si el mtime no llega a cambiar en el mismo tick)."""
+    _cached_normalized.clear()
+    _prebuilt().clear()
 
 
 # ---------- Pending ----------
@@ -14,25 +65,28 @@ def load_pending_files() -> pd.DataFrame:
     """
     Devuelve el DataFrame de 'pending' usando tu normalizador real.
     """
-    store = load_store()
-    _, pending_df = normalize_records(store)
+    _, _, pending_df = load_normalized_store()
     if isinstance(pending_df, pd.DataFrame):
         return pending_df
     return pd.DataFrame()
 
 
 # ---------- Uploads ----------
-def process_uploads(files) -> Tuple[int, int, List[str]]:
+def process_uploads(files, owner_id: Optional[str] = None) -> Tuple[int, int, List[str], List[Dict]]:
     """
     Sube ficheros usando add_uploaded_files() de ta_core.
-    Devuelve: (num_ok, num_fail, logs).
+    Devuelve: (num_ok, num_fail, logs, new_items) — new_items son los hunts añadidos,
+    ya con owner_id sellado si se pasó `owner_id`.
     """
     ok, fail, logs = 0, 0, []
+    new_items: List[Dict] = []
     if not files:
-        return 0, 0, ["No files to process."]
+        return 0, 0, ["No files to process."], new_items
 
+    # Estado normalizado de antes de la subida (normalmente ya en caché): base del delta
+    before = _cached_normalized(*store_signature())
     try:
-        added, skipped = add_uploaded_files(files)
+        added, skipped, new_items = add_uploaded_files(files, owner_id=owner_id)
         ok += int(added)
         if added:
             logs.append(f"Added {added} new file(s).")
@@ -42,7 +96,26 @@ def process_uploads(files) -> Tuple[int, int, List[str]]:
         fail += 1
         logs.append(f"Failed to add files: {e}")
 
-    return ok, fail, logs
+    if new_items:
+        invalidate_store_cache()
+        _prime_after_upload(before, new_items)
+    return ok, fail, logs, new_items
+
+
+def _prime_after_upload(
+    before: Tuple[List[Dict], pd.DataFrame, pd.DataFrame], new_items: List[Dict]
+) -> None:
+    """
+    Deja preparado el resultado de la nueva versión del store: frames de antes de la
+    subida + solo los hunts nuevos normalizados (sin re-normalizar todo el store).
+    add_uploaded_files añade new_items al final del store, en ese orden.
+    """
+    store, norm_df, pending_df = before  # copias de st.cache_data: se pueden ampliar
+    norm_df, pending_df = normalize_records_append(
+        norm_df, pending_df, new_items, derive=_add_derived_columns
+    )
+    # Solo la última versión (invalidate_store_cache vacía el resto): la lee el próximo load
+    _prebuilt()[store_signature()] = (store + new_items, norm_df, pending_df)
 
 
 # ---------- User settings (en memoria por ahora) ----------
@@ -1,4 +1,8 @@
 from __future__ import annotations
+from functools import lru_cache
+from typing import List
+
+import numpy as np
 
 def fmt_int(x):
     try:
@@ -23,3 +27,16 @@ def fmt_hours_from_seconds(sec):
         return f"{h:02d}:{m:02d}h"
     except Exception:
         return ""
+
+@lru_cache(maxsize=4096)
+def _fmt_hm(h: int, m: int) -> str:
+    # Los mismos (h, m) se repiten mucho entre hunts: el texto se construye una vez
+    return f"{m}min" if h <= 0 else (f"{h}h" if m == 0 else f"{h}h {m}min")
+
+def fmt_duration_texts(hours) -> List[str]:
+    """Horas → "Xh Ymin" / "Xmin" para una columna: redondeo y divmod en NumPy; NaN → ''."""
+    hours = np.asarray(hours, dtype=np.float64)
+    valid = ~np.isnan(hours)
+    mins = np.trunc(np.where(valid, hours, 0.0) * 60 + 0.5).astype(np.int64)  # como int(x + 0.5)
+    h, m = np.divmod(mins, 60)
+    return [_fmt_hm(H, M) if ok else "" for H, M, ok in zip(h.tolist(), m.tolist(), valid.tolist())]
@@ -1,5 +1,5 @@
 from __future__ import annotations
-from typing import Dict, List, Tuple, Any
+from typing import Dict, Set, Tuple, Any
 import json
 
 import pandas as pd
@@ -8,18 +8,18 @@ import streamlit as st
 # ===== Dominio =====
 # Backup: ahora ambas funciones vienen del servicio dedicado
 from ta_core.services.backup import (
+    backup_signature,
     export_backup_bytes,
     import_backup_replace_processed,
 )
 
 # Persistencia y utilidades de datos
 from ta_core.repository import (
-    load_store,
     save_store,
     clear_hashes,
 )
 
-from ta_core.normalizer import normalize_records
+from utils.data import load_normalized_store, invalidate_store_cache
 from ta_core.services.auth_service import current_user_id
 from ta_core.auth_repo import get_role
 
@@ -54,9 +54,30 @@ def _row_key_from_store_item(orig: Dict[str, Any]) -> Tuple[str, str, int]:
     return (s_start, s_end, xp)
 
 
+def _keyset_from_df(df: pd.DataFrame) -> Set[Tuple[str, str, int]]:
+    """Claves (session_start, session_end, xp_gain:int) de todas las filas por columnas."""
+    if not isinstance(df, pd.DataFrame) or df.empty:
+        return set()
+    n = len(df)
+    starts = df["session_start"].astype(str).tolist() if "session_start" in df.columns else [""] * n
+    ends = df["session_end"].astype(str).tolist() if "session_end" in df.columns else [""] * n
+    if "xp_gain" in df.columns:
+        # int() trunca igual; lo no numérico/NaN cuenta como 0 (como el ValueError de antes)
+        xps = pd.to_numeric(df["xp_gain"], errors="coerce").fillna(0).astype("int64").tolist()
+    else:
+        xps = [0] * n
+    return set(zip(starts, ends, xps))
+
+
 # ----------------------------
 # Expanders
 # ----------------------------
+@st.cache_data(show_spinner=False, max_entries=2)
+def _cached_backup(sig: tuple) -> Tuple[bytes, str]:
+    """Zip del backup por versión de los ficheros (sig = backup_signature()): no se rehace en cada rerun."""
+    return export_backup_bytes()
+
+
 def _exp_backup() -> None:
     """
     Expander de Backup con:
@@ -66,7 +87,7 @@ def _exp_backup() -> None:
     with st.sidebar.expander("💾 Backup", expanded=False):
         # ---------- Export ----------
         try:
-            data_bytes, fname = export_backup_bytes()
+            data_bytes, fname = _cached_backup(backup_signature())
             mime = "application/json" if str(fname).lower().endswith(".json") else "application/zip"
             st.download_button(
                 "📤 Export backup",
@@ -109,6 +130,18 @@ def _exp_backup() -> None:
                 st.rerun()
 
 
+def _delete_from_store(which: str) -> None:
+    """
+    Callback on_click: borra del store las hunts processed o pending.
+    Corre antes del rerun natural del botón, así que no hace falta st.rerun().
+    """
+    store, norm_df, pending_df = load_normalized_store()
+    keyset = _keyset_from_df(norm_df if which == "processed" else pending_df)
+    save_store([it for it in store if _row_key_from_store_item(it) not in keyset])
+    invalidate_store_cache()
+    st.session_state["_sb_danger_msg"] = f"{which.capitalize()} data deleted."
+
+
 def _exp_danger_zone() -> None:
     """
     Expander de Danger zone con:
@@ -119,69 +152,31 @@ def _exp_danger_zone() -> None:
     with st.sidebar.expander("⚠️ Danger zone", expanded=False):
         st.caption("Destructive actions. Proceed with caution.")
 
-        # Cargar datos para calcular conjuntos processed/pending
-        store: List[Dict[str, Any]] = load_store()
-        norm_df, pending_df = normalize_records(store)
-
-        processed_keyset = set()
-        if isinstance(norm_df, pd.DataFrame) and not norm_df.empty:
-            for _, r in norm_df.iterrows():
-                try:
-                    key = (
-                        str(r.get("session_start", "")),
-                        str(r.get("session_end", "")),
-                        int(r.get("xp_gain", 0)),
-                    )
-                except ValueError:
-                    key = (
-                        str(r.get("session_start", "")),
-                        str(r.get("session_end", "")),
-                        0,
-                    )
-                processed_keyset.add(key)
-
-        pending_keyset = set()
-        if isinstance(pending_df, pd.DataFrame) and not pending_df.empty:
-            for _, r in pending_df.iterrows():
-                try:
-                    key = (
-                        str(r.get("session_start", "")),
-                        str(r.get("session_end", "")),
-                        int(r.get("xp_gain", 0)),
-                    )
-                except ValueError:
-                    key = (
-                        str(r.get("session_start", "")),
-                        str(r.get("session_end", "")),
-                        0,
-                    )
-                pending_keyset.add(key)
+        msg = st.session_state.pop("_sb_danger_msg", None)
+        if msg:
+            st.success(msg)
 
         # 1) Delete processed (keep pending)
         st.checkbox("I understand", key="sb_conf_proc")
-        if st.button(
+        st.button(
             "🧹 Delete processed",
             use_container_width=True,
             disabled=not st.session_state.get("sb_conf_proc", False),
             key="sb_btn_del_processed",
-        ):
-            new_store = [it for it in store if _row_key_from_store_item(it) not in processed_keyset]
-            save_store(new_store)
-            st.success("Processed data deleted. Recomputing")
-            st.rerun()
+            on_click=_delete_from_store,
+            args=("processed",),
+        )
 
         # 2) Delete pending (keep processed)
         st.checkbox("I understand", key="sb_conf_pend")
-        if st.button(
+        st.button(
             "🗑️ Delete pending",
             use_container_width=True,
             disabled=not st.session_state.get("sb_conf_pend", False),
             key="sb_btn_del_pending",
-        ):
-            new_store = [it for it in store if _row_key_from_store_item(it) not in pending_keyset]
-            save_store(new_store)
-            st.success("Pending data deleted. Recomputing")
-            st.rerun()
+            on_click=_delete_from_store,
+            args=("pending",),
+        )
 
         st.divider()
 
@@ -1,13 +1,54 @@
 # utils/tibiawiki.py
 from __future__ import annotations
-import re, base64
+import re, base64, json, os, threading, time
 from urllib.parse import quote
-from typing import Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 import requests
 import streamlit as st
 
+from ta_core.repository import DATA_DIR
+
 WIKI_BASE = "https://tibia.fandom.com/wiki/"
 
+# ---------- Caché en disco de iconos (data URI) ----------
+# Sobrevive a reinicios: en frío cada icono son varias peticiones HTTP a la wiki.
+ICON_CACHE_JSON = os.path.join(DATA_DIR, "icon_cache.json")
+_icon_cache: Optional[Dict[str, List[str]]] = None
+_icon_cache_dirty = False
+_icon_cache_lock = threading.Lock()
+
+def _load_icon_cache() -> Dict[str, List[str]]:
+    """{monster_lc: [data_uri, source_url]} cargado una vez por proceso."""
+    global _icon_cache
+    if _icon_cache is None:
+        try:
+            with open(ICON_CACHE_JSON, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            _icon_cache = data if isinstance(data, dict) else {}
+        except Exception:
+            _icon_cache = {}
+    return _icon_cache
+
+def _save_icon_cache() -> None:
+    """Escribe el fichero solo si hay entradas nuevas (tmp + replace para no dejarlo a medias)."""
+    global _icon_cache_dirty
+    with _icon_cache_lock:
+        if not _icon_cache_dirty or _icon_cache is None:
+            return
+        try:
+            os.makedirs(DATA_DIR, exist_ok=True)
+            tmp = ICON_CACHE_JSON + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(_icon_cache, f, ensure_ascii=False)
+            os.replace(tmp, ICON_CACHE_JSON)
+            _icon_cache_dirty = False
+        except Exception:
+            pass
+
+def flush_icon_cache() -> None:
+    """Persistir iconos nuevos ya (p.ej. tras resolver los de una zona)."""
+    _save_icon_cache()
+
 def _normalize_wiki_title(name: str) -> str:
     s = re.sub(r"\s+", " ", str(name or "").strip())
 
@@ -56,12 +97,27 @@ def get_monster_icon_url(monster_name: str) -> Optional[str]:
         return None
     return None
 
-@st.cache_data(ttl=60*60*24, show_spinner=False)
-def get_monster_icon_bytes(monster_name: str) -> Optional[Tuple[bytes, str, str]]:
+# Fallos recientes (monster_lc → time.time()): no se reintenta la descarga durante 1 día
+_ICON_MISS_TTL = 60 * 60 * 24
+_icon_misses: Dict[str, float] = {}
+
+def fetch_monster_icon_bytes(monster_name: str) -> Optional[Tuple[bytes, str, str]]:
     """
-    Descarga la imagen del monstruo.
+    Descarga la imagen del monstruo sin tocar Streamlit (apta para hilos de trabajo).
     Devuelve (bytes, mime, final_url) o None si falla.
     """
+    key = str(monster_name or "").strip().lower()
+    with _icon_cache_lock:
+        missed_at = _icon_misses.get(key)
+    if missed_at is not None and time.time() - missed_at < _ICON_MISS_TTL:
+        return None
+    res = _download_icon(monster_name)
+    if res is None:
+        with _icon_cache_lock:
+            _icon_misses[key] = time.time()
+    return res
+
+def _download_icon(monster_name: str) -> Optional[Tuple[bytes, str, str]]:
     url = get_monster_icon_url(monster_name)
     if not url:
         return None
@@ -80,13 +136,43 @@ def get_monster_icon_bytes(monster_name: str) -> Optional[Tuple[bytes, str, str]
     except Exception:
         return None
 
+@st.cache_data(ttl=60*60*24, show_spinner=False)
+def get_monster_icon_bytes(monster_name: str) -> Optional[Tuple[bytes, str, str]]:
+    """
+    Descarga la imagen del monstruo.
+    Devuelve (bytes, mime, final_url) o None si falla.
+    """
+    return fetch_monster_icon_bytes(monster_name)
+
+def cached_icon_data_uri(monster_name: str) -> Optional[Tuple[str, str]]:
+    """(data_uri, source_url) si el icono ya está en la caché de disco/proceso; sin red."""
+    key = str(monster_name or "").strip().lower()
+    with _icon_cache_lock:
+        hit = _load_icon_cache().get(key)
+    return (hit[0], hit[1]) if hit else None
+
+def store_icon_data_uri(monster_name: str, data: bytes, mime: str, src_url: str) -> Tuple[str, str]:
+    """Codifica el icono como data URI y lo guarda en la caché (se persiste con flush_icon_cache)."""
+    global _icon_cache_dirty
+    key = str(monster_name or "").strip().lower()
+    b64 = base64.b64encode(data).decode("ascii")
+    pair = (f"data:{mime};base64,{b64}", src_url)
+    with _icon_cache_lock:
+        _load_icon_cache()[key] = list(pair)
+        _icon_cache_dirty = True
+    return pair
+
+@st.cache_data(ttl=60*60*24, show_spinner=False)
 def get_monster_icon_data_uri(monster_name: str) -> Optional[Tuple[str, str]]:
     """
     Devuelve (data_uri, source_url) para usar en <img src="...">.
+    Cacheado: evita re-codificar en base64 el mismo icono en cada rerun.
     """
+    hit = cached_icon_data_uri(monster_name)
+    if hit:
+        return hit
+
     res = get_monster_icon_bytes(monster_name)
     if not res:
-        return None
-    data, mime, src_url = res
-    b64 = base64.b64encode(data).decode("ascii")
-    return (f"data:{mime};base64,{b64}", src_url)
+        return None  # los fallos no se guardan en disco: se reintentan en el próximo arranque
+    return store_icon_data_uri(monster_name, *res)
@@ -52,6 +52,40 @@ def inject_base_css() -> None:
         unsafe_allow_html=True,
     )
 
+@st.cache_resource(show_spinner=False)
+def _account_css_blob() -> str:
+    """CSS estático de la página Account, construido una sola vez por proceso."""
+    return """
+        <style>
+          /* botones 'primary' en rojo (Delete char) */
+          div[data-testid="stButton"] > button[kind="primary"] {
+            background:#ef4444; border-color:#ef4444;
+          }
+          /* marco de detalles de cuenta (ajustado al contenido) */
+          .account-details {
+            display:inline-block;
+            border:1px solid rgba(255,255,255,0.2);
+            border-radius:12px;
+            padding:12px 20px;
+            margin-top:4px;
+          }
+          /* tarjeta de personaje (su Delete va debajo, en la misma columna) */
+          .char-card {
+            border:1px solid rgba(255,255,255,0.2);
+            border-radius:8px; padding:12px;
+          }
+        </style>
+        """
+
+@st.cache_resource(show_spinner=False)
+def _account_header_blob() -> str:
+    """Estilos + título de Account en un solo string (sustituye a st.title + markdown de CSS)."""
+    return _account_css_blob() + "<h1 style='margin-bottom:0'>Account</h1>"
+
+def inject_account_header() -> None:
+    """Cabecera de la página Account (CSS + título) en un único elemento. Llamar 1 vez, arriba de la página."""
+    st.markdown(_account_header_blob(), unsafe_allow_html=True)
+
 def pill_ok(text: str) -> None:
     st.markdown(f'<span class="status-pill ok">{text}</span>', unsafe_allow_html=True)
 
@@ -0,0 +1,10 @@
+# utils/validation.py
+from __future__ import annotations
+import re
+
+_USER_RE = re.compile(r"[A-Za-z0-9_]+")
+
+
+def valid_username(s: str) -> bool:
+    """3–10 chars, solo letras/números/underscore. El check de longitud evita el regex en el caso común."""
+    return 3 <= len(s) <= 10 and _USER_RE.fullmatch(s) is not None